@@ -1,9 +1,17 @@
 from flask import Flask, jsonify
+import os
 import psutil
 import time
 
+from com import client, profiler, ratelimit
+
+# 预热CPU采样基准，使/health中的非阻塞采样返回有效值
+psutil.cpu_percent(interval=None)
+
 # 创建Flask应用
 app = Flask(__name__)
+ratelimit.init_app(app)
+profiler.init_app(app)
 
 @app.route('/')
 def home():
@@ -18,7 +26,8 @@ def health_check():
     """健康检查端点"""
     try:
         # 获取系统信息
-        cpu_percent = psutil.cpu_percent(interval=1)
+        # 非阻塞采样：返回距上次调用以来的CPU使用率，避免每次请求阻塞1秒
+        cpu_percent = psutil.cpu_percent(interval=None)
         memory = psutil.virtual_memory()
         disk = psutil.disk_usage('/')
         
@@ -40,5 +49,13 @@ def health_check():
             'timestamp': time.time()
         }), 500
 
+@app.route('/debug/pools')
+def pool_metrics():
+    """当前worker的下游连接池指标"""
+    return jsonify({
+        'pid': os.getpid(),
+        'pools': client.pool_metrics()
+    }), 200
+
 if __name__ == '__main__':
     app.run()
\ No newline at end of file
@@ -10,6 +10,11 @@ import sys
 import subprocess
 import json
 import time
+import fnmatch
+import hashlib
+import http.client
+import shutil
+import threading
 from pathlib import Path
 
 class FlaskDeployer:
@@ -17,8 +22,81 @@ class FlaskDeployer:
         self.project_root = Path(__file__).parent
         self.app_name = "bigbrother_server"
         self.service_name = f"{self.app_name}.service"
+        self.health_service_name = f"{self.app_name}-health.service"
+        # 健康监控以root运行，脚本放在root所有的目录，避免应用用户修改后被root执行
+        self.health_monitor_path = f"/usr/local/lib/{self.app_name}/health_monitor.py"
+        self.health_log_dir = f"/var/log/{self.app_name}-health"
         self.user = "flask"
         self.port = 5000
+        # Nginx限流（按客户端IP），应用层令牌桶见 com/ratelimit.py
+        self.rate_limit_rate = "30r/s"
+        self.rate_limit_burst = 60
+        # TLS配置，通过 --tls 或 --self-signed 启用
+        self.server_name = "_"
+        self.tls_enabled = False
+        self.tls_self_signed = False
+        self.ssl_dir = "/etc/nginx/ssl"
+        self.ssl_certificate = f"{self.ssl_dir}/{self.app_name}.crt"
+        self.ssl_certificate_key = f"{self.ssl_dir}/{self.app_name}.key"
+        self.ssl_trusted_certificate = None     # OCSP装订校验用的CA链，为空时不校验装订响应
+        # 自签名证书使用独立文件名，关闭应用时只删除这两个文件，不会误删正式证书
+        self.self_signed_certificate = f"{self.ssl_dir}/{self.app_name}-selfsigned.crt"
+        self.self_signed_certificate_key = f"{self.ssl_dir}/{self.app_name}-selfsigned.key"
+        self.resolver = "119.29.29.29 223.5.5.5"
+        self.app_dir = f"/opt/{self.app_name}"
+        self.deployment_info_path = f"{self.app_dir}/deployment_info.json"
+        self.nginx_config_path = f"/etc/nginx/conf.d/{self.app_name}.conf"
+        
+        # 增量同步时忽略的文件（按路径中的任一级名称匹配）
+        self.sync_ignore_patterns = [
+            ".git",
+            ".gitignore",
+            ".idea",
+            "__pycache__",
+            "*.pyc",
+            "*.pyo",
+            ".pytest_cache",
+            "venv",
+            ".venv",
+            "requests.jsonl",
+            # 开发、测试和部署用文件，运行时不需要，变更也不应触发重启
+            "benchmarks",
+            "tests",
+            "*.md",
+            "*.patch",
+            "test_output.txt",
+            "bench_output.txt",
+            "app_deploy.py",
+            "app_shutdown.py",
+            "health_monitor.py",
+            # 以下文件由部署脚本在目标目录生成，不能被同步覆盖
+            "deployment_info.json",
+            "gunicorn.conf.py",
+            "health_check.sh",
+        ]
+        # 本次同步生成的清单和结果，写入deployment_info.json
+        self.sync_manifest = {}
+        self.sync_result = {}
+        # 被覆盖或删除的旧文件备份，性能门禁未通过时用于回滚
+        self.rollback_dir = f"/opt/{self.app_name}.rollback"
+        self.previous_manifest = {}
+        # 部署脚本生成的配置文件在重新生成前的快照，回滚时一并恢复
+        self.config_rollback_dir = f"/opt/{self.app_name}.rollback-config"
+        self.config_snapshot = {}
+        self.deployment_rejected = False     # 已执行回滚，避免重复回滚
+        
+        # 切流前的性能门禁：固定负载，与上次成功部署的基线比较
+        self.gate_enabled = True
+        self.gate_requests = 2000           # 总请求数
+        self.gate_warmup_requests = 100     # 预热请求数（不计入统计）
+        self.gate_concurrency = 8
+        self.gate_paths = ["/", "/health"]
+        self.gate_ready_timeout = 30        # 等待服务就绪的最长时间（秒）
+        self.gate_max_error_rate = 0.01     # 允许的最大错误率（绝对值）
+        self.gate_max_p99_ratio = 1.5       # p99延迟相对基线的最大倍数
+        self.gate_p99_slack_ms = 5.0        # p99的绝对容差，避免基线很小时误判
+        self.gate_max_rss_ratio = 1.3       # 单worker最大RSS相对基线的最大倍数
+        self.performance_result = {}
         
     def run_command(self, command, check=True, shell=True):
         """执行系统命令（实时输出）"""
@@ -140,20 +218,234 @@ class FlaskDeployer:
         for dep in production_deps:
             self.run_command(f"{pip_cmd} install {dep}")
     
+    def load_deployment_info(self):
+        """读取上一次部署信息，不存在或损坏时返回空字典"""
+        try:
+            with open(self.deployment_info_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    def write_file_atomic(self, path, content):
+        """原子写入文本文件：先写临时文件再替换，避免读到半个文件"""
+        tmp_path = f"{path}.tmp-{os.getpid()}"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    
+    def is_sync_ignored(self, rel_path):
+        """判断相对路径是否命中忽略规则"""
+        for part in Path(rel_path).parts:
+            for pattern in self.sync_ignore_patterns:
+                if fnmatch.fnmatch(part, pattern):
+                    return True
+        return False
+    
+    @staticmethod
+    def hash_file(path):
+        """计算文件内容的sha256"""
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+    
+    def build_manifest(self, root):
+        """扫描目录，生成 {相对路径: {sha256, size}} 清单"""
+        manifest = {}
+        for dirpath, dirnames, filenames in os.walk(root):
+            rel_dir = os.path.relpath(dirpath, root)
+            # 原地裁剪，避免进入被忽略的目录（如.git）
+            dirnames[:] = sorted(
+                d for d in dirnames
+                if not self.is_sync_ignored(os.path.normpath(os.path.join(rel_dir, d)))
+            )
+            for name in sorted(filenames):
+                rel_path = os.path.normpath(os.path.join(rel_dir, name))
+                if self.is_sync_ignored(rel_path):
+                    continue
+                full_path = os.path.join(dirpath, name)
+                if not os.path.isfile(full_path):
+                    continue
+                manifest[Path(rel_path).as_posix()] = {
+                    "sha256": self.hash_file(full_path),
+                    "size": os.path.getsize(full_path),
+                }
+        return manifest
+    
+    def makedirs_owned(self, path):
+        """逐级创建缺失的目录，新建的目录属主设为应用用户"""
+        missing = []
+        while path and not os.path.isdir(path):
+            missing.append(path)
+            path = os.path.dirname(path)
+        for directory in reversed(missing):
+            os.makedirs(directory, exist_ok=True)
+            shutil.chown(directory, self.user, self.user)
+    
+    def copy_file_atomic(self, src, dest):
+        """复制文件到临时文件后原子替换，并设置属主"""
+        self.makedirs_owned(os.path.dirname(dest))
+        tmp_path = f"{dest}.tmp-{os.getpid()}"
+        try:
+            shutil.copy2(src, tmp_path)
+            shutil.chown(tmp_path, self.user, self.user)
+            os.replace(tmp_path, dest)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    
+    def is_file_unchanged(self, dest, entry):
+        """判断目标文件是否已是最新内容
+        
+        始终直接比较目标文件的哈希：清单只在部署成功后写入，中途失败时它与磁盘内容不一致
+        """
+        if not os.path.isfile(dest) or os.path.getsize(dest) != entry["size"]:
+            return False
+        return self.hash_file(dest) == entry["sha256"]
+    
+    def backup_file(self, dest, backup_root, rel_path):
+        """覆盖或删除前备份旧文件"""
+        if backup_root is None:
+            return
+        backup_path = os.path.join(backup_root, rel_path)
+        os.makedirs(os.path.dirname(backup_path), exist_ok=True)
+        shutil.copy2(dest, backup_path)
+    
+    def sync_files(self, src_root, dest_root, previous_manifest, backup_root=None):
+        """按内容哈希增量同步文件，返回新清单和同步结果"""
+        manifest = self.build_manifest(src_root)
+        added, modified, removed = [], [], []
+        bytes_copied = 0
+        
+        for rel_path, entry in manifest.items():
+            dest = os.path.join(dest_root, rel_path)
+            existed = os.path.isfile(dest)
+            if self.is_file_unchanged(dest, entry):
+                continue
+            if existed:
+                self.backup_file(dest, backup_root, rel_path)
+            self.copy_file_atomic(os.path.join(src_root, rel_path), dest)
+            bytes_copied += entry["size"]
+            (modified if existed else added).append(rel_path)
+        
+        # 只删除上次由同步写入、而本次源目录中已不存在的文件
+        for rel_path in previous_manifest:
+            if rel_path in manifest:
+                continue
+            dest = os.path.join(dest_root, rel_path)
+            if os.path.isfile(dest):
+                self.backup_file(dest, backup_root, rel_path)
+                os.remove(dest)
+                removed.append(rel_path)
+        
+        changed = added + modified + removed
+        result = {
+            "added": added,
+            "modified": modified,
+            "removed": removed,
+            "bytes_copied": bytes_copied,
+            "total_files": len(manifest),
+            # 静态文件变更无需重启，代码或依赖变更需要重启服务
+            "restart_required": any(not p.startswith("static/") for p in changed),
+            "dependencies_changed": "requirements.txt" in changed,
+        }
+        return manifest, result
+    
     def deploy_application(self):
-        """部署应用"""
+        """部署应用（按内容哈希增量同步）"""
         print("=== 部署应用 ===")
         
         # 创建应用目录
-        app_dir = f"/opt/{self.app_name}"
-        self.run_command(f"mkdir -p {app_dir}")
+        self.run_command(f"mkdir -p {self.app_dir}")
+        self.run_command(f"chown {self.user}:{self.user} {self.app_dir}")
         
-        # 复制应用文件
-        self.run_command(f"cp -r {self.project_root}/* {app_dir}/")
+        # 读取上次部署的文件清单
+        self.previous_manifest = self.load_deployment_info().get("manifest", {})
+        
+        # 清理上一次的回滚备份
+        if os.path.exists(self.rollback_dir):
+            shutil.rmtree(self.rollback_dir)
+        
+        # 增量同步应用文件
+        self.sync_manifest, self.sync_result = self.sync_files(
+            str(self.project_root), self.app_dir, self.previous_manifest, self.rollback_dir
+        )
+        
+        result = self.sync_result
+        print(f"同步完成: 新增 {len(result['added'])}，修改 {len(result['modified'])}，"
+              f"删除 {len(result['removed'])}，共 {result['total_files']} 个文件，"
+              f"复制 {result['bytes_copied']} 字节")
+        for label, key in (("新增", "added"), ("修改", "modified"), ("删除", "removed")):
+            for rel_path in result[key]:
+                print(f"  {label}: {rel_path}")
+        if result["dependencies_changed"]:
+            print("requirements.txt 已变更，需要重新安装依赖")
+        print(f"是否需要重启服务: {'是' if result['restart_required'] else '否'}")
         
         # 设置权限
-        self.run_command(f"chown -R {self.user}:{self.user} {app_dir}")
-        self.run_command(f"chmod +x {app_dir}/app.py")
+        self.run_command(f"chmod +x {self.app_dir}/app.py")
+    
+    @staticmethod
+    def unit_path(unit):
+        """systemd unit文件路径"""
+        return f"/etc/systemd/system/{unit}"
+    
+    def generated_config_paths(self):
+        """部署脚本生成、不在同步清单中的配置文件"""
+        return [
+            f"{self.app_dir}/gunicorn.conf.py",
+            self.unit_path(self.service_name),
+            self.unit_path(self.health_service_name),
+            self.nginx_config_path,
+            self.health_monitor_path,
+            # 旧版cron式健康检查脚本，create_health_check会删除它
+            f"{self.app_dir}/health_check.sh",
+        ]
+    
+    def snapshot_generated_config(self):
+        """重新生成配置前保存当前版本，记录每个文件原来的属主，不存在的记为None"""
+        if os.path.exists(self.config_rollback_dir):
+            shutil.rmtree(self.config_rollback_dir)
+        self.config_snapshot = {}
+        for path in self.generated_config_paths():
+            self.config_snapshot[path] = None
+            if os.path.isfile(path):
+                stat = os.stat(path)
+                self.config_snapshot[path] = (stat.st_uid, stat.st_gid)
+                backup_path = os.path.join(self.config_rollback_dir, path.lstrip("/"))
+                os.makedirs(os.path.dirname(backup_path), exist_ok=True)
+                shutil.copy2(path, backup_path)
+    
+    def is_new_config(self, path):
+        """该配置文件是否由本次部署新建"""
+        return path in self.config_snapshot and self.config_snapshot[path] is None
+    
+    def restore_generated_config(self):
+        """恢复配置快照，本次新生成的文件直接删除"""
+        for path, owner in self.config_snapshot.items():
+            if owner is None:
+                if os.path.exists(path):
+                    os.remove(path)
+                continue
+            backup_path = os.path.join(self.config_rollback_dir, path.lstrip("/"))
+            tmp_path = f"{path}.tmp-{os.getpid()}"
+            shutil.copy2(backup_path, tmp_path)
+            os.chown(tmp_path, *owner)
+            os.replace(tmp_path, path)
+    
+    def has_previous_version(self):
+        """目标目录中是否有上一个版本的应用文件
+        
+        根据本次同步结果判断而不是上次的清单：旧版部署脚本（cp -r）没有写入清单，
+        但目标目录中已有的文件仍然会表现为未变更或被修改
+        """
+        result = self.sync_result
+        if not result:
+            return False
+        return len(result["added"]) < result["total_files"] or bool(result["removed"])
     
     def create_gunicorn_config(self):
         """创建Gunicorn配置"""
@@ -183,12 +475,29 @@ daemon = False
 
 # 超时配置
 timeout = 30
-keepalive = 2
+# 长连接空闲保持时间需大于健康监控的探测间隔（10秒），Nginx的upstream长连接同样受益
+keepalive = 15
 
 # 安全配置
 limit_request_line = 4094
 limit_request_fields = 100
 limit_request_field_size = 8190
+
+
+# 下游连接池按worker创建：fork后丢弃继承的连接，gevent补丁完成后再建池
+def post_fork(server, worker):
+    from com import client
+    client.reset_after_fork()
+
+
+def post_worker_init(worker):
+    from com import client
+    client.init_pools()
+
+
+def worker_exit(server, worker):
+    from com import client
+    client.close_pools()
 """
         
         # 创建日志目录
@@ -226,7 +535,7 @@ RestartSec=3
 WantedBy=multi-user.target
 """
         
-        service_path = f"/etc/systemd/system/{self.service_name}"
+        service_path = self.unit_path(self.service_name)
         with open(service_path, 'w', encoding='utf-8') as f:
             f.write(service_content)
         
@@ -234,22 +543,88 @@ WantedBy=multi-user.target
         self.run_command("systemctl daemon-reload")
         self.run_command(f"systemctl enable {self.service_name}")
     
+    def create_tls_certificate(self):
+        """自签名模式下生成本地测试证书"""
+        if not self.tls_enabled:
+            return
+        print("=== 准备TLS证书 ===")
+        
+        if not self.tls_self_signed:
+            for path in (self.ssl_certificate, self.ssl_certificate_key):
+                if not os.path.exists(path):
+                    print(f"证书文件不存在: {path}")
+                    sys.exit(1)
+            return
+        
+        self.ssl_certificate = self.self_signed_certificate
+        self.ssl_certificate_key = self.self_signed_certificate_key
+        if os.path.exists(self.ssl_certificate) and os.path.exists(self.ssl_certificate_key):
+            print(f"自签名证书已存在: {self.ssl_certificate}")
+            return
+        
+        # ECDSA P-256证书握手计算量远小于RSA
+        self.run_command(f"mkdir -p {self.ssl_dir}")
+        self.run_command(
+            f"openssl req -x509 -nodes -days 365 "
+            f"-newkey ec -pkeyopt ec_paramgen_curve:prime256v1 "
+            f"-subj '/CN=localhost' -addext 'subjectAltName=DNS:localhost,IP:127.0.0.1' "
+            f"-keyout {self.ssl_certificate_key} -out {self.ssl_certificate}"
+        )
+        self.run_command(f"chmod 600 {self.ssl_certificate_key}")
+    
+    def tls_config(self):
+        """生成HTTPS server块中的TLS配置"""
+        config = f"""    # 证书
+    ssl_certificate {self.ssl_certificate};
+    ssl_certificate_key {self.ssl_certificate_key};
+    
+    # 协议与套件
+    ssl_protocols TLSv1.2 TLSv1.3;
+    ssl_ecdh_curve X25519:prime256v1;
+    ssl_prefer_server_ciphers off;
+    
+    # 会话复用：共享缓存 + 会话票据，重连时跳过完整握手
+    ssl_session_cache shared:{self.app_name}_ssl:10m;
+    ssl_session_timeout 1d;
+    ssl_session_tickets on;
+    
+    # 较小的TLS记录，降低首字节延迟
+    ssl_buffer_size 4k;
+    
+    # HTTP/2 连接复用
+    http2_max_concurrent_streams 128;
+    keepalive_timeout 75s;
+    
+"""
+        if not self.tls_self_signed:
+            # 校验装订响应需要签发者证书，未提供 --chain 时只装订不校验
+            stapling_verify = ""
+            if self.ssl_trusted_certificate:
+                stapling_verify = f"""    ssl_stapling_verify on;
+    ssl_trusted_certificate {self.ssl_trusted_certificate};
+"""
+            config += f"""    # OCSP装订
+    ssl_stapling on;
+{stapling_verify}    resolver {self.resolver} valid=300s;
+    resolver_timeout 5s;
+    
+    add_header Strict-Transport-Security "max-age=31536000" always;
+    
+"""
+        return config
+    
     def create_nginx_config(self):
         """创建Nginx配置"""
         print("=== 创建Nginx配置 ===")
         
-        nginx_config = f"""upstream flask_app {{
-    server 127.0.0.1:{self.port};
-    keepalive 32;
-}}
-
-server {{
-    listen 80;
-    server_name _;
-    
-    # 客户端最大请求体大小
+        # 各server块共用的代理、路由和安全设置
+        server_body = f"""    # 客户端最大请求体大小
     client_max_body_size 10M;
     
+    # 限流返回429
+    limit_req_status 429;
+    limit_req_log_level warn;
+    
     # 超时设置
     proxy_connect_timeout 60s;
     proxy_send_timeout 60s;
@@ -263,6 +638,7 @@ server {{
     
     # 主要应用路由
     location / {{
+        limit_req zone={self.app_name}_req burst={self.rate_limit_burst} nodelay;
         proxy_pass http://flask_app;
         proxy_set_header Host $host;
         proxy_set_header X-Real-IP $remote_addr;
@@ -280,6 +656,18 @@ server {{
         add_header X-Content-Type-Options nosniff;
     }}
     
+    # 性能剖析端点仅允许本机访问
+    location /debug/ {{
+        allow 127.0.0.1;
+        allow ::1;
+        deny all;
+        proxy_pass http://flask_app;
+        proxy_set_header Host $host;
+        proxy_set_header X-Real-IP $remote_addr;
+        proxy_set_header X-Forwarded-For $proxy_add_x_forwarded_for;
+        proxy_read_timeout 90s;
+    }}
+    
     # 健康检查端点
     location /health {{
         proxy_pass http://flask_app;
@@ -306,10 +694,45 @@ server {{
     # 日志配置
     access_log /var/log/nginx/{self.app_name}_access.log;
     error_log /var/log/nginx/{self.app_name}_error.log;
+"""
+        
+        nginx_config = f"""# 按客户端IP限流，第一道防线
+limit_req_zone $binary_remote_addr zone={self.app_name}_req:10m rate={self.rate_limit_rate};
+
+upstream flask_app {{
+    server 127.0.0.1:{self.port};
+    keepalive 32;
+}}
+"""
+        
+        if self.tls_enabled:
+            nginx_config += f"""
+server {{
+    listen 80;
+    server_name {self.server_name};
+    
+    # HTTP请求全部跳转到HTTPS
+    location / {{
+        return 301 https://$host$request_uri;
+    }}
 }}
+
+server {{
+    listen 443 ssl http2;
+    server_name {self.server_name};
+    
+{self.tls_config()}{server_body}}}
+"""
+        else:
+            nginx_config += f"""
+server {{
+    listen 80;
+    server_name {self.server_name};
+    
+{server_body}}}
 """
         
-        nginx_config_path = f"/etc/nginx/conf.d/{self.app_name}.conf"
+        nginx_config_path = self.nginx_config_path
         with open(nginx_config_path, 'w', encoding='utf-8') as f:
             f.write(nginx_config)
         
@@ -320,46 +743,246 @@ server {{
         """启动服务"""
         print("=== 启动服务 ===")
         
-        # 启动Flask应用
-        self.run_command(f"systemctl start {self.service_name}")
+        # 启动Flask应用（已运行时重启以加载新代码）
+        self.run_command(f"systemctl restart {self.service_name}")
         
         # 重启nginx
         self.run_command("systemctl restart nginx")
         
+        # 启动健康监控
+        self.run_command(f"systemctl restart {self.health_service_name}")
+        
         # 检查服务状态
         self.run_command(f"systemctl status {self.service_name}")
         self.run_command("systemctl status nginx")
     
+    def wait_until_ready(self):
+        """等待应用在本机端口上返回健康状态"""
+        deadline = time.monotonic() + self.gate_ready_timeout
+        while time.monotonic() < deadline:
+            try:
+                conn = http.client.HTTPConnection("127.0.0.1", self.port, timeout=2)
+                conn.request("GET", "/health")
+                status = conn.getresponse().status
+                conn.close()
+                if status == 200:
+                    return True
+            except (OSError, http.client.HTTPException):
+                pass
+            time.sleep(0.5)
+        return False
+    
+    def run_load_profile(self):
+        """在本机回环上执行固定负载，返回延迟列表和错误数"""
+        latencies = []
+        errors = [0]
+        lock = threading.Lock()
+        per_worker = self.gate_requests // self.gate_concurrency
+        warmup = self.gate_warmup_requests // self.gate_concurrency
+        
+        def worker():
+            # 直连Gunicorn，不带X-Real-IP，视为内部流量不受应用层限流
+            conn = http.client.HTTPConnection("127.0.0.1", self.port, timeout=10)
+            local_latencies = []
+            local_errors = 0
+            for i in range(warmup + per_worker):
+                path = self.gate_paths[i % len(self.gate_paths)]
+                start = time.perf_counter()
+                try:
+                    conn.request("GET", path)
+                    response = conn.getresponse()
+                    response.read()
+                    failed = response.status >= 400
+                    if response.will_close:
+                        conn.close()
+                except (OSError, http.client.HTTPException):
+                    conn.close()
+                    failed = True
+                elapsed = time.perf_counter() - start
+                if i >= warmup:
+                    local_latencies.append(elapsed)
+                    local_errors += int(failed)
+            conn.close()
+            with lock:
+                latencies.extend(local_latencies)
+                errors[0] += local_errors
+        
+        threads = [threading.Thread(target=worker) for _ in range(self.gate_concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return latencies, errors[0]
+    
+    def get_worker_rss(self):
+        """读取Gunicorn各worker进程的RSS（KB）"""
+        result = subprocess.run(['systemctl', 'show', '-p', 'MainPID', '--value', self.service_name],
+                                capture_output=True, text=True)
+        main_pid = result.stdout.strip()
+        if not main_pid or main_pid == "0":
+            return {}
+        
+        worker_rss = {}
+        for pid in os.listdir("/proc"):
+            if not pid.isdigit():
+                continue
+            try:
+                with open(f"/proc/{pid}/status", 'r', encoding='utf-8') as f:
+                    status = dict(line.split(":", 1) for line in f if ":" in line)
+            except OSError:
+                continue
+            if status.get("PPid", "").strip() == main_pid and "VmRSS" in status:
+                worker_rss[pid] = int(status["VmRSS"].split()[0])
+        return worker_rss
+    
+    def run_smoke_gate(self):
+        """切流前性能门禁，未通过时回滚"""
+        if not self.gate_enabled:
+            print("=== 跳过性能门禁 ===")
+            # 沿用上次的基线
+            self.performance_result = self.load_deployment_info().get("performance", {})
+            return
+        print("=== 性能门禁 ===")
+        
+        if not self.wait_until_ready():
+            self.reject_deployment([f"服务在 {self.gate_ready_timeout}s 内未就绪"])
+        
+        latencies, errors = self.run_load_profile()
+        latencies.sort()
+        total = len(latencies)
+        p99_ms = latencies[min(total - 1, int(total * 0.99))] * 1000 if total else 0.0
+        error_rate = errors / total if total else 1.0
+        worker_rss = self.get_worker_rss()
+        max_rss_kb = max(worker_rss.values()) if worker_rss else 0
+        
+        self.performance_result = {
+            "requests": total,
+            "concurrency": self.gate_concurrency,
+            "paths": self.gate_paths,
+            "p50_ms": round(latencies[total // 2] * 1000, 3) if total else 0.0,
+            "p99_ms": round(p99_ms, 3),
+            "error_rate": round(error_rate, 4),
+            "workers": len(worker_rss),
+            "max_worker_rss_kb": max_rss_kb,
+        }
+        print(f"本次结果: p99 {p99_ms:.2f}ms，错误率 {error_rate:.2%}，"
+              f"worker数 {len(worker_rss)}，最大worker RSS {max_rss_kb}KB")
+        
+        baseline = self.load_deployment_info().get("performance", {})
+        failures = []
+        if error_rate > self.gate_max_error_rate:
+            failures.append(f"错误率 {error_rate:.2%} 超过 {self.gate_max_error_rate:.2%}")
+        if baseline:
+            print(f"基线结果: p99 {baseline.get('p99_ms', 0):.2f}ms，"
+                  f"最大worker RSS {baseline.get('max_worker_rss_kb', 0)}KB")
+            p99_limit = baseline.get("p99_ms", 0) * self.gate_max_p99_ratio + self.gate_p99_slack_ms
+            if baseline.get("p99_ms") and p99_ms > p99_limit:
+                failures.append(f"p99 {p99_ms:.2f}ms 超过上限 {p99_limit:.2f}ms")
+            rss_limit = baseline.get("max_worker_rss_kb", 0) * self.gate_max_rss_ratio
+            if baseline.get("max_worker_rss_kb") and max_rss_kb > rss_limit:
+                failures.append(f"最大worker RSS {max_rss_kb}KB 超过上限 {rss_limit:.0f}KB")
+        else:
+            print("没有基线数据，本次结果将作为基线")
+        
+        if failures:
+            self.reject_deployment(failures)
+        print("性能门禁通过")
+    
+    def reject_deployment(self, reasons):
+        """门禁未通过或部署步骤失败：回滚到上次部署的文件和配置并重启服务，保留原部署信息"""
+        self.deployment_rejected = True
+        print("部署检查未通过:")
+        for reason in reasons:
+            print(f"  - {reason}")
+        
+        if not self.has_previous_version():
+            # 首次部署没有可回滚的版本，停止服务避免承接流量（健康监控也要停止，否则会把服务重新拉起）
+            print("没有可回滚的版本，停止服务")
+            self.run_command(f"systemctl stop {self.health_service_name}", check=False)
+            self.run_command(f"systemctl stop {self.service_name}", check=False)
+            sys.exit(1)
+        
+        print("=== 回滚应用 ===")
+        for rel_path in self.sync_result.get("added", []):
+            dest = os.path.join(self.app_dir, rel_path)
+            if os.path.exists(dest):
+                os.remove(dest)
+        for rel_path in self.sync_result.get("modified", []) + self.sync_result.get("removed", []):
+            self.copy_file_atomic(os.path.join(self.rollback_dir, rel_path),
+                                  os.path.join(self.app_dir, rel_path))
+        if self.sync_result.get("dependencies_changed"):
+            print("注意: requirements.txt 已变更，虚拟环境中的依赖未回滚")
+        
+        print("=== 回滚配置 ===")
+        # 本次新建的服务要在删除unit文件之前停用，否则disable找不到unit，服务继续运行并留下wants链接
+        new_units = [
+            unit for unit in (self.service_name, self.health_service_name)
+            if self.is_new_config(self.unit_path(unit))
+        ]
+        for unit in new_units:
+            self.run_command(f"systemctl disable --now {unit}", check=False)
+        self.restore_generated_config()
+        self.run_command("systemctl daemon-reload", check=False)
+        self.run_command("nginx -t && systemctl reload nginx", check=False)
+        
+        for unit in (self.service_name, self.health_service_name):
+            if unit not in new_units:
+                self.run_command(f"systemctl restart {unit}", check=False)
+        print("已回滚到上次部署的版本")
+        sys.exit(1)
+    
+    def install_health_monitor(self):
+        """以root:root、0644安装健康监控脚本"""
+        monitor_dir = os.path.dirname(self.health_monitor_path)
+        os.makedirs(monitor_dir, mode=0o755, exist_ok=True)
+        tmp_path = f"{self.health_monitor_path}.tmp-{os.getpid()}"
+        shutil.copyfile(self.project_root / "health_monitor.py", tmp_path)
+        os.chown(tmp_path, 0, 0)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, self.health_monitor_path)
+    
     def create_health_check(self):
-        """创建健康检查脚本"""
-        print("=== 创建健康检查脚本 ===")
+        """创建健康监控守护进程服务"""
+        print("=== 创建健康监控服务 ===")
         
-        health_check_script = f"""#!/bin/bash
-# 健康检查脚本
-
-APP_URL="http://localhost:{self.port}/health"
-LOG_FILE="/var/log/{self.app_name}/health.log"
+        self.install_health_monitor()
+        
+        # 使用系统Python和root所有的脚本，不执行应用用户可写的venv或/opt下的代码
+        service_content = f"""[Unit]
+Description={self.app_name} Health Monitor
+After={self.service_name}
+Wants={self.service_name}
 
-# 检查应用是否响应
-response=$(curl -s -o /dev/null -w "%{{http_code}}" $APP_URL)
+[Service]
+Type=simple
+WorkingDirectory=/
+LogsDirectory={os.path.basename(self.health_log_dir)}
+ExecStart=/usr/bin/python3 {self.health_monitor_path} \\
+    --url http://127.0.0.1:{self.port}/health \\
+    --service {self.service_name} \\
+    --interval 10 --timeout 3 \\
+    --fail-threshold 3 --recover-threshold 2 \\
+    --reload-after 2 --restart-after 3 --cooldown 60 \\
+    --status-file {self.health_log_dir}/health_status.json \\
+    --log-file {self.health_log_dir}/health.log
+Restart=always
+RestartSec=5
 
-if [ $response -eq 200 ]; then
-    echo "$(date): 应用运行正常" >> $LOG_FILE
-    exit 0
-else
-    echo "$(date): 应用无响应，HTTP状态码: $response" >> $LOG_FILE
-    # 重启服务
-    systemctl restart {self.service_name}
-    exit 1
-fi
+[Install]
+WantedBy=multi-user.target
 """
         
-        health_script_path = f"/opt/{self.app_name}/health_check.sh"
-        with open(health_script_path, 'w', encoding='utf-8') as f:
-            f.write(health_check_script)
+        service_path = self.unit_path(self.health_service_name)
+        with open(service_path, 'w', encoding='utf-8') as f:
+            f.write(service_content)
+        
+        # 清理旧版本的cron式健康检查脚本
+        legacy_script = f"/opt/{self.app_name}/health_check.sh"
+        if os.path.exists(legacy_script):
+            os.remove(legacy_script)
         
-        self.run_command(f"chmod +x {health_script_path}")
-        self.run_command(f"chown {self.user}:{self.user} {health_script_path}")
+        self.run_command("systemctl daemon-reload")
+        self.run_command(f"systemctl enable {self.health_service_name}")
     
     def create_deployment_info(self):
         """创建部署信息文件"""
@@ -372,14 +995,24 @@ fi
             "port": self.port,
             "app_directory": f"/opt/{self.app_name}",
             "service_name": self.service_name,
-            "nginx_config": f"/etc/nginx/conf.d/{self.app_name}.conf",
+            "nginx_config": self.nginx_config_path,
+            "tls": {
+                "enabled": self.tls_enabled,
+                "self_signed": self.tls_self_signed,
+                "certificate": self.ssl_certificate if self.tls_enabled else None
+            },
             "log_directory": f"/var/log/{self.app_name}",
-            "health_check_script": f"/opt/{self.app_name}/health_check.sh"
+            "health_monitor_service": self.health_service_name
         }
         
-        info_path = f"/opt/{self.app_name}/deployment_info.json"
-        with open(info_path, 'w', encoding='utf-8') as f:
-            json.dump(deployment_info, f, indent=2, ensure_ascii=False)
+        deployment_info["sync"] = self.sync_result
+        deployment_info["performance"] = self.performance_result
+        deployment_info["manifest"] = self.sync_manifest
+        
+        info_path = self.deployment_info_path
+        self.write_file_atomic(
+            info_path, json.dumps(deployment_info, indent=2, ensure_ascii=False)
+        )
         
         self.run_command(f"chown {self.user}:{self.user} {info_path}")
     
@@ -393,16 +1026,27 @@ fi
             self.create_flask_user()
             self.setup_python_environment()
             self.deploy_application()
-            self.create_gunicorn_config()
-            self.create_systemd_service()
-            self.create_nginx_config()
-            self.create_health_check()
-            self.start_services()
+            self.snapshot_generated_config()
+            try:
+                self.create_gunicorn_config()
+                self.create_systemd_service()
+                self.create_tls_certificate()
+                self.create_nginx_config()
+                self.create_health_check()
+                self.start_services()
+                self.run_smoke_gate()
+            except (Exception, SystemExit) as e:
+                # 新文件已同步、配置已重新生成，之后任何一步失败（如新版本导入失败导致服务未启动、
+                # nginx -t 未通过）都要回滚，不能让新版本留在线上
+                if self.deployment_rejected:
+                    raise
+                reason = "部署步骤执行失败" if isinstance(e, SystemExit) else f"部署过程中出现错误: {e}"
+                self.reject_deployment([reason])
             self.create_deployment_info()
             
             print("\n=== 部署完成 ===")
             print(f"应用名称: {self.app_name}")
-            print(f"访问地址: http://localhost")
+            print(f"访问地址: {'https' if self.tls_enabled else 'http'}://localhost")
             print(f"应用端口: {self.port}")
             print(f"服务名称: {self.service_name}")
             print("\n常用命令:")
@@ -411,6 +1055,7 @@ fi
             print(f"  查看日志: journalctl -u {self.service_name} -f")
             print(f"  查看nginx状态: systemctl status nginx")
             print(f"  健康检查: curl http://localhost/health")
+            print(f"  健康监控日志: tail -f {self.health_log_dir}/health.log")
             
         except Exception as e:
             print(f"部署过程中出现错误: {e}")
@@ -423,8 +1068,19 @@ def main():
 Flask应用部署脚本
 
 用法:
-    python3 app_deploy.py          # 执行完整部署
-    python3 app_deploy.py --help   # 显示帮助信息
+    python3 app_deploy.py                          # 执行完整部署（HTTP）
+    python3 app_deploy.py --tls --cert C --key K   # 启用HTTPS + HTTP/2，使用已有证书
+    python3 app_deploy.py --self-signed            # 启用HTTPS + HTTP/2，生成本地自签名证书（测试用）
+    python3 app_deploy.py --help                   # 显示帮助信息
+
+选项:
+    --tls               启用TLS
+    --cert PATH         证书文件（含中间证书）
+    --key PATH          私钥文件
+    --chain PATH        OCSP装订校验使用的CA证书链（不提供时只装订不校验）
+    --server-name NAME  Nginx server_name
+    --self-signed       生成自签名证书并启用TLS，不启用OCSP装订
+    --skip-gate         跳过切流前的性能门禁
 
 功能:
     - 安装系统依赖
@@ -433,14 +1089,40 @@ Flask应用部署脚本
     - 部署Flask应用
     - 配置Gunicorn
     - 创建systemd服务
-    - 配置Nginx反向代理
-    - 创建健康检查脚本
+    - 配置Nginx反向代理（可选HTTPS + HTTP/2）
+    - 创建健康监控服务
+    - 性能门禁：与上次部署比较p99、错误率和worker内存，未通过时回滚
 
 注意: 建议使用root权限运行此脚本
         """)
         return
     
     deployer = FlaskDeployer()
+    
+    args = sys.argv[1:]
+    while args:
+        option = args.pop(0)
+        if option == "--tls":
+            deployer.tls_enabled = True
+        elif option == "--skip-gate":
+            deployer.gate_enabled = False
+        elif option == "--self-signed":
+            deployer.tls_enabled = True
+            deployer.tls_self_signed = True
+        elif option in ("--cert", "--key", "--chain", "--server-name") and args:
+            value = args.pop(0)
+            if option == "--cert":
+                deployer.ssl_certificate = value
+            elif option == "--key":
+                deployer.ssl_certificate_key = value
+            elif option == "--chain":
+                deployer.ssl_trusted_certificate = value
+            else:
+                deployer.server_name = value
+        else:
+            print(f"未知参数: {option}，使用 --help 查看用法")
+            sys.exit(1)
+    
     deployer.deploy()
 
 if __name__ == "__main__":
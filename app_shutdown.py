@@ -6,6 +6,7 @@ Flask应用关闭脚本
 """
 
 import os
+import shlex
 import sys
 import subprocess
 import shutil
@@ -15,6 +16,7 @@ class FlaskShutdown:
     def __init__(self):
         self.app_name = "bigbrother_server"
         self.service_name = f"{self.app_name}.service"
+        self.health_service_name = f"{self.app_name}-health.service"
         self.user = "flask"
         self.app_dir = f"/opt/{self.app_name}"
         self.venv_dir = f"/home/{self.user}/venv"
@@ -44,6 +46,11 @@ class FlaskShutdown:
         """停止服务"""
         print("=== 停止服务 ===")
         
+        # 停止健康监控，避免其在关闭过程中重启应用
+        print("停止健康监控服务...")
+        self.run_command(f"systemctl stop {self.health_service_name}")
+        self.run_command(f"systemctl disable {self.health_service_name}")
+        
         # 停止Flask应用服务
         print("停止Flask应用服务...")
         self.run_command(f"systemctl stop {self.service_name}")
@@ -71,13 +78,14 @@ class FlaskShutdown:
         """删除systemd服务"""
         print("=== 删除systemd服务 ===")
         
-        service_path = f"/etc/systemd/system/{self.service_name}"
-        if os.path.exists(service_path):
-            print(f"删除服务文件: {service_path}")
-            os.remove(service_path)
-            self.run_command("systemctl daemon-reload")
-        else:
-            print(f"服务文件不存在: {service_path}")
+        for service_name in (self.health_service_name, self.service_name):
+            service_path = f"/etc/systemd/system/{service_name}"
+            if os.path.exists(service_path):
+                print(f"删除服务文件: {service_path}")
+                os.remove(service_path)
+            else:
+                print(f"服务文件不存在: {service_path}")
+        self.run_command("systemctl daemon-reload")
     
     def remove_nginx_config(self):
         """删除Nginx配置"""
@@ -89,6 +97,13 @@ class FlaskShutdown:
             os.remove(nginx_config_path)
         else:
             print(f"Nginx配置文件不存在: {nginx_config_path}")
+        
+        # 只删除部署脚本生成的自签名证书（--self-signed 模式），正式证书由运维自行管理
+        for cert_file in (f"/etc/nginx/ssl/{self.app_name}-selfsigned.crt",
+                          f"/etc/nginx/ssl/{self.app_name}-selfsigned.key"):
+            if os.path.exists(cert_file):
+                print(f"删除证书文件: {cert_file}")
+                os.remove(cert_file)
     
     def remove_application_files(self):
         """删除应用文件"""
@@ -99,6 +114,18 @@ class FlaskShutdown:
             shutil.rmtree(self.app_dir)
         else:
             print(f"应用目录不存在: {self.app_dir}")
+        
+        # 删除root所有的健康监控脚本
+        monitor_dir = f"/usr/local/lib/{self.app_name}"
+        if os.path.exists(monitor_dir):
+            print(f"删除健康监控脚本目录: {monitor_dir}")
+            shutil.rmtree(monitor_dir)
+        
+        # 删除部署时保留的回滚备份
+        for rollback_dir in (f"{self.app_dir}.rollback", f"{self.app_dir}.rollback-config"):
+            if os.path.exists(rollback_dir):
+                print(f"删除回滚备份: {rollback_dir}")
+                shutil.rmtree(rollback_dir)
     
     def remove_logs(self):
         """删除日志文件"""
@@ -111,6 +138,12 @@ class FlaskShutdown:
         else:
             print(f"日志目录不存在: {log_dir}")
         
+        # 删除健康监控日志
+        health_log_dir = f"/var/log/{self.app_name}-health"
+        if os.path.exists(health_log_dir):
+            print(f"删除健康监控日志目录: {health_log_dir}")
+            shutil.rmtree(health_log_dir)
+        
         # 删除Nginx相关日志
         nginx_logs = [
             f"/var/log/nginx/{self.app_name}_access.log",
@@ -173,6 +206,44 @@ class FlaskShutdown:
         else:
             print(f"PID文件不存在: {pid_file}")
     
+    def get_service_environment(self):
+        """读取应用服务配置的环境变量（含 systemctl edit 的覆盖配置）"""
+        result = self.run_command(f"systemctl show -p Environment --value {self.service_name}")
+        environment = {}
+        if isinstance(result, subprocess.CompletedProcess) and result.returncode == 0:
+            for item in shlex.split(result.stdout):
+                name, sep, value = item.partition("=")
+                if sep:
+                    environment[name] = value
+        return environment
+    
+    def get_rate_limit_file(self):
+        """按 com/ratelimit.py 的 _default_path() 规则确定限流文件路径"""
+        environment = self.get_service_environment()
+        if environment.get("BIGBROTHER_RATE_LIMIT_FILE"):
+            return environment["BIGBROTHER_RATE_LIMIT_FILE"]
+        if os.path.isdir("/dev/shm"):
+            directory = "/dev/shm"
+        else:
+            # 与服务进程中 tempfile.gettempdir() 的取值一致
+            directory = next(
+                (environment[name] for name in ("TMPDIR", "TEMP", "TMP")
+                 if environment.get(name) and os.path.isdir(environment[name])),
+                "/tmp",
+            )
+        return os.path.join(directory, f"{self.app_name}_ratelimit")
+    
+    def cleanup_shared_memory(self):
+        """清理限流共享内存文件"""
+        print("=== 清理共享内存文件 ===")
+        
+        shm_file = self.get_rate_limit_file()
+        if os.path.exists(shm_file):
+            print(f"删除共享内存文件: {shm_file}")
+            os.remove(shm_file)
+        else:
+            print(f"共享内存文件不存在: {shm_file}")
+    
     def kill_remaining_processes(self):
         """杀死残留进程"""
         print("=== 杀死残留进程 ===")
@@ -196,7 +267,7 @@ class FlaskShutdown:
         print("已删除的内容:")
         print(f"  - 应用目录: {self.app_dir}")
         print(f"  - 虚拟环境: {self.venv_dir}")
-        print(f"  - 系统服务: {self.service_name}")
+        print(f"  - 系统服务: {self.service_name}, {self.health_service_name}")
         print(f"  - Nginx配置: /etc/nginx/conf.d/{self.app_name}.conf")
         print(f"  - 日志目录: /var/log/{self.app_name}")
         print(f"  - Flask用户: {self.user}")
@@ -227,6 +298,7 @@ class FlaskShutdown:
             self.stop_services()
             self.kill_remaining_processes()
             self.cleanup_pid_files()
+            self.cleanup_shared_memory()
             self.remove_systemd_service()
             self.remove_nginx_config()
             self.remove_supervisor_config()
@@ -265,6 +337,7 @@ class FlaskShutdown:
             self.app_dir,
             self.venv_dir,
             f"/etc/systemd/system/{self.service_name}",
+            f"/etc/systemd/system/{self.health_service_name}",
             f"/etc/nginx/conf.d/{self.app_name}.conf"
         ]
         
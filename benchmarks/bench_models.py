@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+模型层微基准：对比 com.models.Model 与普通dict的单对象内存、编码和解码耗时
+
+用法:
+    python3 benchmarks/bench_models.py [--count 100000]
+"""
+
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from com.models import Model, dumps
+
+
+class Item(Model):
+    id: int
+    name: str
+    price: float
+    tags: List[str] = []
+
+
+def make_dict(i):
+    return {'id': i, 'name': f'item-{i}', 'price': i * 1.5, 'tags': ['a', 'b']}
+
+
+def make_model(i):
+    return Item(id=i, name=f'item-{i}', price=i * 1.5, tags=['a', 'b'])
+
+
+def measure_memory(factory, count):
+    """返回每个对象的平均内存占用（字节）"""
+    gc.collect()
+    tracemalloc.start()
+    objects = [factory(i) for i in range(count)]
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del objects
+    return current / count
+
+
+def measure_time(func, items):
+    """返回每次调用的平均耗时（微秒）"""
+    start = time.perf_counter()
+    for item in items:
+        func(item)
+    return (time.perf_counter() - start) / len(items) * 1e6
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="模型层微基准")
+    parser.add_argument("--count", type=int, default=100000, help="对象数量")
+    args = parser.parse_args(argv)
+
+    count = args.count
+    dicts = [make_dict(i) for i in range(count)]
+    models = [make_model(i) for i in range(count)]
+    dict_payloads = [json.dumps(d).encode('utf-8') for d in dicts]
+    model_payloads = [m.to_bytes() for m in models]
+
+    results = [
+        ("单对象内存 (bytes)", measure_memory(make_dict, count), measure_memory(make_model, count)),
+        ("构造 (us)", measure_time(make_dict, range(count)), measure_time(make_model, range(count))),
+        ("编码为bytes (us)", measure_time(dumps, dicts), measure_time(Item.to_bytes, models)),
+        ("解码 (us)", measure_time(json.loads, dict_payloads), measure_time(Item.from_bytes, model_payloads)),
+    ]
+
+    print(f"对象数量: {count}（dict不做校验，Model包含类型校验）")
+    print(f"{'指标':<20}{'dict':>12}{'Model':>12}{'比例':>10}")
+    for name, dict_value, model_value in results:
+        ratio = model_value / dict_value if dict_value else 0.0
+        print(f"{name:<20}{dict_value:>12.2f}{model_value:>12.2f}{ratio:>9.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TLS基准：在本机回环上测量握手耗时（完整握手 vs 会话复用）和多路复用请求延迟
+
+用法:
+    python3 benchmarks/bench_tls.py [--host 127.0.0.1] [--port 443] [--count 200] [--concurrency 50]
+
+HTTP/2测试需要 httpx[http2]（pip install 'httpx[http2]'），未安装时退化为HTTP/1.1长连接串行请求。
+"""
+
+import argparse
+import asyncio
+import socket
+import ssl
+import time
+
+
+def percentile(values, p):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(p / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summary(values):
+    """毫秒统计"""
+    return (f"avg {sum(values) / len(values) * 1000:8.3f}ms  "
+            f"p50 {percentile(values, 50) * 1000:8.3f}ms  "
+            f"p99 {percentile(values, 99) * 1000:8.3f}ms")
+
+
+def make_context(verify):
+    context = ssl.create_default_context()
+    if not verify:
+        # 自签名证书模式
+        context.check_hostname = False
+        context.verify_mode = ssl.CERT_NONE
+    # 握手测试需要发送请求并读取响应才能拿到TLS 1.3的会话票据，固定使用HTTP/1.1
+    context.set_alpn_protocols(["http/1.1"])
+    return context
+
+
+def handshake(context, host, port, server_name, path, session=None):
+    """完成一次握手并发送一个请求，返回 (握手耗时, 会话, 是否复用, ALPN协议)"""
+    with socket.create_connection((host, port), timeout=10) as raw:
+        raw.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        start = time.perf_counter()
+        with context.wrap_socket(raw, server_hostname=server_name, session=session) as tls:
+            elapsed = time.perf_counter() - start
+            protocol = tls.selected_alpn_protocol()
+            reused = tls.session_reused
+            # TLS 1.3 的会话票据在握手后才下发，读完响应以确保拿到票据
+            tls.sendall(f"HEAD {path} HTTP/1.1\r\nHost: {server_name}\r\nConnection: close\r\n\r\n".encode())
+            while tls.recv(4096):
+                pass
+            return elapsed, tls.session, reused, protocol
+
+
+def bench_handshakes(args):
+    context = make_context(args.verify)
+    full = []
+    for _ in range(args.count):
+        elapsed, _, _, protocol = handshake(context, args.host, args.port, args.server_name, args.path)
+        full.append(elapsed)
+
+    resumed = []
+    reused_count = 0
+    _, session, _, _ = handshake(context, args.host, args.port, args.server_name, args.path)
+    for _ in range(args.count):
+        elapsed, new_session, reused, _ = handshake(
+            context, args.host, args.port, args.server_name, args.path, session=session
+        )
+        resumed.append(elapsed)
+        reused_count += int(reused)
+        session = new_session or session
+
+    print(f"ALPN协商结果: {protocol}")
+    print(f"完整握手   {summary(full)}")
+    print(f"会话复用   {summary(resumed)}  复用成功 {reused_count}/{args.count}")
+
+
+async def _bench_http2(args, httpx):
+    url = f"https://{args.host}:{args.port}{args.path}"
+    async with httpx.AsyncClient(http2=True, verify=args.verify,
+                                 headers={"Host": args.server_name}) as client:
+        await client.get(url)   # 预热，建立连接
+
+        async def one():
+            start = time.perf_counter()
+            response = await client.get(url)
+            return time.perf_counter() - start, response.http_version, response.status_code
+
+        results = []
+        for offset in range(0, args.count, args.concurrency):
+            batch = min(args.concurrency, args.count - offset)
+            results.extend(await asyncio.gather(*(one() for _ in range(batch))))
+
+    latencies = [r[0] for r in results]
+    errors = sum(1 for r in results if r[2] >= 400)
+    print(f"{results[0][1]} 单连接并发{args.concurrency}  {summary(latencies)}  错误 {errors}/{len(results)}")
+
+
+def bench_http1(args):
+    import http.client
+    context = make_context(args.verify)
+    conn = http.client.HTTPSConnection(args.host, args.port, context=context, timeout=10)
+    latencies = []
+    errors = 0
+    for _ in range(args.count):
+        start = time.perf_counter()
+        conn.request("GET", args.path, headers={"Host": args.server_name})
+        response = conn.getresponse()
+        response.read()
+        latencies.append(time.perf_counter() - start)
+        errors += int(response.status >= 400)
+    conn.close()
+    print(f"HTTP/1.1 长连接串行  {summary(latencies)}  错误 {errors}/{args.count}")
+
+
+def bench_requests(args):
+    try:
+        import httpx
+        import h2  # noqa: F401  httpx的HTTP/2支持依赖h2
+    except ImportError:
+        print("未安装 httpx[http2]，使用HTTP/1.1长连接代替多路复用测试")
+        bench_http1(args)
+        return
+    asyncio.run(_bench_http2(args, httpx))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="TLS握手与多路复用基准")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=443)
+    parser.add_argument("--server-name", default="localhost", help="SNI / Host")
+    parser.add_argument("--path", default="/health", help="请求路径（/health不受限流影响）")
+    parser.add_argument("--count", type=int, default=200, help="每项测试的次数")
+    parser.add_argument("--concurrency", type=int, default=50, help="HTTP/2单连接并发流数")
+    parser.add_argument("--verify", action="store_true", help="校验证书（自签名模式下不要开启）")
+    args = parser.parse_args(argv)
+
+    print(f"目标: https://{args.host}:{args.port}{args.path}")
+    print("=== 握手 ===")
+    bench_handshakes(args)
+    print("=== 请求延迟 ===")
+    bench_requests(args)
+
+
+if __name__ == "__main__":
+    main()
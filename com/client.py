@@ -0,0 +1,289 @@
+"""
+下游连接池
+
+每个Gunicorn worker独立持有自己的连接池，避免fork后多个进程共用同一个socket：
+- post_fork 钩子调用 reset_after_fork()，丢弃从master继承的连接
+- post_worker_init 钩子调用 init_pools()，此时gevent已完成猴子补丁，池内的锁和等待都是协作式的
+- worker_exit 钩子调用 close_pools()
+
+HTTP服务通过 config.HTTP_SERVICES 配置，其他连接（如数据库）通过 register_pool() 注册工厂函数：
+
+    client.register_pool('main_db', lambda: pymysql.connect(...), max_size=5)
+    with client.get_pool('main_db').connection() as conn:
+        ...
+"""
+import http.client
+import os
+import threading
+import time
+from collections import deque, namedtuple
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+import config
+
+
+class PoolTimeout(Exception):
+    """在 acquire_timeout 内没有可用连接"""
+
+
+class ConnectionPool:
+    """有界连接池：LIFO复用热连接，空闲超时的连接被回收"""
+
+    def __init__(self, name: str, factory, max_size: int = config.CLIENT_POOL_SIZE,
+                 idle_timeout: float = config.CLIENT_POOL_IDLE_TIMEOUT,
+                 acquire_timeout: float = config.CLIENT_POOL_ACQUIRE_TIMEOUT, close=None):
+        self.name = name
+        self.factory = factory
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.acquire_timeout = acquire_timeout
+        self._close = close or (lambda conn: conn.close())
+        self._cond = threading.Condition()
+        self._pid = os.getpid()
+        self._reset_state()
+
+    def _reset_state(self):
+        self._idle = deque()    # (连接, 归还时间)，右端为最近归还
+        self.in_use = 0
+        self.created = 0
+        self.evicted = 0
+        self.acquired = 0
+        self.waits = 0
+        self.timeouts = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+
+    def _check_pid(self):
+        # 在fork后的子进程中首次使用时丢弃继承来的连接
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._reset_state()
+
+    def _evict_idle(self, now: float):
+        while self._idle and now - self._idle[0][1] > self.idle_timeout:
+            conn, _ = self._idle.popleft()
+            self.evicted += 1
+            self._safe_close(conn)
+
+    def _safe_close(self, conn):
+        try:
+            self._close(conn)
+        except Exception:
+            pass
+
+    def acquire(self):
+        """获取一个连接，池满时最多等待 acquire_timeout 秒"""
+        start = time.monotonic()
+        deadline = start + self.acquire_timeout
+        waited = False
+        with self._cond:
+            self._check_pid()
+            while True:
+                now = time.monotonic()
+                self._evict_idle(now)
+                if self._idle:
+                    conn, _ = self._idle.pop()
+                    self.in_use += 1
+                    break
+                if self.in_use < self.max_size:
+                    # 先占位，在锁外创建连接
+                    self.in_use += 1
+                    conn = None
+                    break
+                remaining = deadline - now
+                if remaining <= 0:
+                    self.timeouts += 1
+                    raise PoolTimeout(f"连接池 {self.name} 在 {self.acquire_timeout}s 内没有可用连接")
+                waited = True
+                self._cond.wait(remaining)
+
+            wait_time = time.monotonic() - start
+            self.acquired += 1
+            if waited:
+                self.waits += 1
+            self.wait_time_total += wait_time
+            self.wait_time_max = max(self.wait_time_max, wait_time)
+
+        if conn is None:
+            try:
+                conn = self.factory()
+            except BaseException:
+                with self._cond:
+                    self.in_use -= 1
+                    self._cond.notify()
+                raise
+            with self._cond:
+                self.created += 1
+        return conn
+
+    def release(self, conn, discard: bool = False):
+        """归还连接，discard为True时直接关闭"""
+        with self._cond:
+            if self._pid != os.getpid():
+                return
+            self.in_use -= 1
+            if discard:
+                self._safe_close(conn)
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        """以上下文方式使用连接，出现异常时丢弃该连接"""
+        conn = self.acquire()
+        try:
+            yield conn
+        except BaseException:
+            self.release(conn, discard=True)
+            raise
+        else:
+            self.release(conn)
+
+    def close(self):
+        """关闭所有空闲连接"""
+        with self._cond:
+            while self._idle:
+                conn, _ = self._idle.popleft()
+                self._safe_close(conn)
+
+    def metrics(self) -> dict:
+        with self._cond:
+            self._check_pid()
+            return {
+                'pid': self._pid,
+                'max_size': self.max_size,
+                'in_use': self.in_use,
+                'idle': len(self._idle),
+                'created': self.created,
+                'evicted': self.evicted,
+                'acquired': self.acquired,
+                'waits': self.waits,
+                'timeouts': self.timeouts,
+                'wait_time_avg_ms': round(self.wait_time_total / self.acquired * 1000, 3) if self.acquired else 0.0,
+                'wait_time_max_ms': round(self.wait_time_max * 1000, 3),
+            }
+
+
+HTTPResult = namedtuple('HTTPResult', ['status', 'headers', 'body'])
+
+# 这些方法在复用的长连接被对端关闭时可以安全重试
+_IDEMPOTENT_METHODS = {'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'}
+_STALE_CONNECTION_ERRORS = (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError)
+
+
+class HTTPClient:
+    """基于连接池的HTTP/1.1长连接客户端"""
+
+    def __init__(self, name: str, base_url: str, timeout: float = config.CLIENT_REQUEST_TIMEOUT, **pool_options):
+        parts = urlsplit(base_url)
+        connection_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+        self.host = parts.hostname
+        self.port = parts.port
+        self.base_path = parts.path.rstrip('/')
+        self.timeout = timeout
+        self.pool = ConnectionPool(
+            name,
+            lambda: connection_class(self.host, self.port, timeout=self.timeout),
+            **pool_options,
+        )
+
+    def request(self, method: str, path: str, body=None, headers: dict = None) -> HTTPResult:
+        method = method.upper()
+        attempts = 2 if method in _IDEMPOTENT_METHODS else 1
+        for attempt in range(attempts):
+            conn = self.pool.acquire()
+            reused = conn.sock is not None
+            try:
+                conn.request(method, self.base_path + path, body=body, headers=headers or {})
+                response = conn.getresponse()
+                result = HTTPResult(response.status, dict(response.getheaders()), response.read())
+            except _STALE_CONNECTION_ERRORS:
+                self.pool.release(conn, discard=True)
+                if reused and attempt + 1 < attempts:
+                    continue
+                raise
+            except BaseException:
+                self.pool.release(conn, discard=True)
+                raise
+            self.pool.release(conn, discard=response.will_close)
+            return result
+
+    def get(self, path: str, headers: dict = None) -> HTTPResult:
+        return self.request('GET', path, headers=headers)
+
+    def post(self, path: str, body=None, headers: dict = None) -> HTTPResult:
+        return self.request('POST', path, body=body, headers=headers)
+
+    def close(self):
+        self.pool.close()
+
+
+_pool_factories = {}    # name -> (factory, pool_options)
+_pools = {}
+_http_clients = {}
+_initialized_pid = None
+
+
+def register_pool(name: str, factory, **pool_options):
+    """注册一个自定义连接池（如数据库），在 init_pools() 时按worker创建"""
+    _pool_factories[name] = (factory, pool_options)
+    if _initialized_pid == os.getpid():
+        _pools[name] = ConnectionPool(name, factory, **pool_options)
+
+
+def reset_after_fork():
+    """丢弃从master继承的连接池，不关闭socket（master仍在使用它们）"""
+    global _initialized_pid
+    _pools.clear()
+    _http_clients.clear()
+    _initialized_pid = None
+
+
+def init_pools():
+    """为当前进程创建全部连接池"""
+    global _initialized_pid
+    close_pools()
+    for name, base_url in config.HTTP_SERVICES.items():
+        http_client = HTTPClient(name, base_url)
+        _http_clients[name] = http_client
+        _pools[name] = http_client.pool
+    for name, (factory, pool_options) in _pool_factories.items():
+        _pools[name] = ConnectionPool(name, factory, **pool_options)
+    _initialized_pid = os.getpid()
+
+
+def close_pools():
+    """关闭当前进程的全部连接池"""
+    global _initialized_pid
+    if _initialized_pid == os.getpid():
+        for pool in _pools.values():
+            pool.close()
+    _pools.clear()
+    _http_clients.clear()
+    _initialized_pid = None
+
+
+def _ensure_initialized():
+    # 未经Gunicorn钩子启动（如 flask run）时按需初始化
+    if _initialized_pid != os.getpid():
+        reset_after_fork()
+        init_pools()
+
+
+def http_client(name: str) -> HTTPClient:
+    _ensure_initialized()
+    return _http_clients[name]
+
+
+def get_pool(name: str) -> ConnectionPool:
+    _ensure_initialized()
+    return _pools[name]
+
+
+def pool_metrics() -> dict:
+    """当前worker所有连接池的指标"""
+    if _initialized_pid != os.getpid():
+        return {}
+    return {name: pool.metrics() for name, pool in _pools.items()}
@@ -0,0 +1 @@
+from com.models.base import Model, ValidationError, dumps
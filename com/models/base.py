@@ -0,0 +1,289 @@
+"""
+轻量数据模型
+
+继承 Model 并声明类型注解即可定义模型，类创建时一次性生成：
+- __slots__：实例不带 __dict__，内存占用接近元组
+- __init__ / to_dict / from_dict：根据字段生成的专用代码，不在运行时遍历字段
+- 字段校验器：按类型注解组合，可通过 validate_<字段名> 静态方法追加自定义校验
+
+支持的注解：Any、int、float、str、bool、list、dict、Model子类、List[X]、Dict[str, X]、
+Optional[X] / Union[...]（含 X | None 写法）。其他注解及保留字段名在类创建时抛出 TypeError。
+
+    class User(Model):
+        id: int
+        name: str
+        tags: List[str] = []
+
+        @staticmethod
+        def validate_name(value):
+            if not value:
+                raise ValueError('不能为空')
+            return value
+
+    User(id=1, name='a').to_bytes()  # b'{"id":1,"name":"a","tags":[]}'
+"""
+import json
+import types
+import typing
+
+_MISSING = object()
+_encoder = json.JSONEncoder(separators=(',', ':'), ensure_ascii=False)
+
+
+class ValidationError(ValueError):
+    """字段校验失败"""
+
+    def __init__(self, model: str, field: str, message: str):
+        super().__init__(f"{model}.{field}: {message}")
+        self.model = model
+        self.field = field
+
+
+def dumps(obj) -> bytes:
+    """紧凑JSON编码为bytes"""
+    return _encoder.encode(obj).encode('utf-8')
+
+
+def _type_name(tp) -> str:
+    return getattr(tp, '__name__', None) or str(tp)
+
+
+def _identity(value):
+    return value
+
+
+# 可直接出现在注解中的JSON类型（int/float单独处理，排除bool）
+_PLAIN_TYPES = (str, bool, list, dict)
+_UNION_TYPES = (typing.Union, getattr(types, 'UnionType', typing.Union))
+
+# 生成代码中使用的名称和模型自身的方法，不能作为字段名
+_RESERVED_FIELDS = frozenset({
+    'self', 'cls', 'data', 'ValidationError',
+    'to_dict', 'from_dict', 'to_bytes', 'from_bytes',
+})
+
+
+def _build_validator(tp):
+    """根据类型注解生成校验函数，返回 (校验函数, 序列化函数或None)
+
+    不支持的注解在类创建时抛出 TypeError，而不是被静默放过。
+    """
+    origin = typing.get_origin(tp)
+    args = typing.get_args(tp)
+
+    if tp is typing.Any:
+        return _identity, None
+
+    if origin in _UNION_TYPES:
+        arms = [_build_validator(arg) for arg in args if arg is not type(None)]
+        nullable = len(arms) < len(args)
+        if len(arms) == 1:
+            inner, inner_serialize = arms[0]
+        else:
+            if any(arm_serialize is not None for _, arm_serialize in arms):
+                raise TypeError(f"不支持包含模型或嵌套模型的多类型Union: {tp!r}")
+            validators = [validate for validate, _ in arms]
+            names = ' | '.join(_type_name(arg) for arg in args if arg is not type(None))
+
+            def inner(value):
+                for validate in validators:
+                    try:
+                        return validate(value)
+                    except (TypeError, ValueError):
+                        pass
+                raise TypeError(f"应为{names}，实际为{type(value).__name__}")
+            inner_serialize = None
+        if not nullable:
+            return inner, inner_serialize
+
+        def validate_optional(value):
+            return None if value is None else inner(value)
+
+        serialize = None
+        if inner_serialize is not None:
+            def serialize(value):
+                return None if value is None else inner_serialize(value)
+        return validate_optional, serialize
+
+    if origin is list:
+        item, item_serialize = _build_validator(args[0]) if args else (_identity, None)
+
+        def validate_list(value):
+            if not isinstance(value, list):
+                raise TypeError(f"应为list，实际为{type(value).__name__}")
+            return [item(v) for v in value]
+
+        serialize = None
+        if item_serialize is not None:
+            def serialize(value):
+                return [item_serialize(v) for v in value]
+        return validate_list, serialize
+
+    if origin is dict:
+        if args and args[0] is not str:
+            raise TypeError(f"dict的键只支持str: {tp!r}")
+        item, item_serialize = _build_validator(args[1]) if args else (_identity, None)
+
+        def validate_dict(value):
+            if not isinstance(value, dict):
+                raise TypeError(f"应为dict，实际为{type(value).__name__}")
+            return {k: item(v) for k, v in value.items()}
+
+        serialize = None
+        if item_serialize is not None:
+            def serialize(value):
+                return {k: item_serialize(v) for k, v in value.items()}
+        return validate_dict, serialize
+
+    if origin is not None:
+        raise TypeError(f"不支持的字段类型: {tp!r}")
+
+    if isinstance(tp, type) and issubclass(tp, Model):
+        def validate_model(value):
+            if isinstance(value, tp):
+                return value
+            if isinstance(value, dict):
+                return tp.from_dict(value)
+            raise TypeError(f"应为{tp.__name__}，实际为{type(value).__name__}")
+        return validate_model, tp.to_dict
+
+    if tp is float:
+        def validate_float(value):
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                raise TypeError(f"应为float，实际为{type(value).__name__}")
+            return float(value)
+        return validate_float, None
+
+    if tp is int:
+        def validate_int(value):
+            if isinstance(value, bool) or not isinstance(value, int):
+                raise TypeError(f"应为int，实际为{type(value).__name__}")
+            return value
+        return validate_int, None
+
+    if tp in _PLAIN_TYPES:
+        def validate_type(value):
+            if not isinstance(value, tp):
+                raise TypeError(f"应为{_type_name(tp)}，实际为{type(value).__name__}")
+            return value
+        return validate_type, None
+
+    raise TypeError(f"不支持的字段类型: {tp!r}")
+
+
+class ModelMeta(type):
+    def __new__(mcs, name, bases, namespace):
+        own_fields = list(namespace.get('__annotations__', {}))
+        for field in own_fields:
+            if field.startswith('_') or field in _RESERVED_FIELDS:
+                raise TypeError(f"{name}.{field}: 字段名不能以下划线开头或使用保留名称")
+        defaults = {field: namespace.pop(field) for field in own_fields if field in namespace}
+        namespace['__slots__'] = tuple(own_fields)
+        cls = super().__new__(mcs, name, bases, namespace)
+
+        inherited_defaults = {}
+        fields = []
+        for base in reversed(cls.__mro__[1:]):
+            for field in getattr(base, '_fields', ()):
+                if field not in fields:
+                    fields.append(field)
+            inherited_defaults.update(getattr(base, '_field_defaults', {}))
+        fields.extend(field for field in own_fields if field not in fields)
+        inherited_defaults.update(defaults)
+
+        cls._fields = tuple(fields)
+        cls._field_defaults = inherited_defaults
+        if bases:
+            _compile(cls)
+        return cls
+
+
+def _compile(cls):
+    """为模型类生成 __init__ / to_dict / from_dict"""
+    hints = typing.get_type_hints(cls)
+    # 生成代码中的参数名即字段名，内置函数以私有名称引用，避免被同名字段（如 str）遮蔽
+    env = {'_MISSING': _MISSING, 'ValidationError': ValidationError, '_model': cls.__name__, '_str': str}
+
+    params = []
+    init_lines = []
+    to_dict_items = []
+    from_dict_args = []
+    for field in cls._fields:
+        try:
+            validate, serialize = _build_validator(hints.get(field, typing.Any))
+        except TypeError as e:
+            raise TypeError(f"{cls.__name__}.{field}: {e}") from None
+        custom = getattr(cls, f'validate_{field}', None)
+        if custom is not None:
+            def validate(value, _type_check=validate, _custom=custom):
+                return _custom(_type_check(value))
+
+        env[f'_v_{field}'] = validate
+        if field in cls._field_defaults:
+            default = cls._field_defaults[field]
+            if isinstance(default, (list, dict, set)):
+                env[f'_f_{field}'] = lambda _default=default: type(_default)(_default)
+                params.append(f'{field}=_MISSING')
+                init_lines.append(f'    if {field} is _MISSING: {field} = _f_{field}()')
+            else:
+                env[f'_d_{field}'] = default
+                params.append(f'{field}=_d_{field}')
+        else:
+            params.append(f'{field}=_MISSING')
+            init_lines.append(f'    if {field} is _MISSING: raise ValidationError(_model, {field!r}, "缺少必填字段")')
+        init_lines.append(f'    try: self.{field} = _v_{field}({field})')
+        init_lines.append(f'    except (TypeError, ValueError) as e: raise ValidationError(_model, {field!r}, _str(e)) from None')
+
+        if serialize is None:
+            to_dict_items.append(f'{field!r}: self.{field}')
+        else:
+            env[f'_s_{field}'] = serialize
+            to_dict_items.append(f'{field!r}: _s_{field}(self.{field})')
+        fallback = f'_d_{field}' if f'_d_{field}' in env else '_MISSING'
+        from_dict_args.append(f'{field}=data.get({field!r}, {fallback})')
+
+    source = '\n'.join([
+        f"def __init__(self, *, {', '.join(params)}):" if params else 'def __init__(self):',
+        *(init_lines or ['    pass']),
+        'def to_dict(self):',
+        f"    return {{{', '.join(to_dict_items)}}}",
+        'def from_dict(cls, data):',
+        '    if not isinstance(data, dict): raise ValidationError(_model, "*", "应为dict")',
+        f"    return cls({', '.join(from_dict_args)})",
+    ])
+    namespace = {}
+    exec(source, env, namespace)
+    cls.__init__ = namespace['__init__']
+    cls.to_dict = namespace['to_dict']
+    cls.from_dict = classmethod(namespace['from_dict'])
+
+
+class Model(metaclass=ModelMeta):
+    """模型基类，字段全部以关键字参数传入"""
+
+    def to_dict(self) -> dict:
+        raise NotImplementedError
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        raise NotImplementedError
+
+    def to_bytes(self) -> bytes:
+        return dumps(self.to_dict())
+
+    @classmethod
+    def from_bytes(cls, data):
+        try:
+            decoded = json.loads(data)
+        except ValueError as e:
+            raise ValidationError(cls.__name__, '*', f"JSON解析失败: {e}") from None
+        return cls.from_dict(decoded)
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        return all(getattr(self, f) == getattr(other, f) for f in self._fields)
+
+    def __repr__(self):
+        fields = ', '.join(f'{f}={getattr(self, f)!r}' for f in self._fields)
+        return f'{type(self).__name__}({fields})'
@@ -0,0 +1,192 @@
+"""
+进程内性能剖析（默认关闭）
+
+- GET /debug/profile?seconds=N[&pid=P][&save=1]
+  对处理该请求的worker做N秒统计采样，返回折叠栈文本（flamegraph.pl / speedscope可直接读取）。
+  指定pid时，若请求落到其他worker则返回409和当前pid，调用方重试即可命中目标worker。
+- 任意请求附加 ?profile=1
+  返回该请求的cProfile统计结果，替代原响应。
+
+两者都要求 config.PROFILING_ENABLED 开启，并在 X-Profile-Token 头中携带 config.PROFILING_TOKEN。
+
+注意：cProfile 按线程记录，gevent下同一worker的所有协程共享一个线程，
+?profile=1 的结果会包含该请求期间运行的其他协程。每个worker同一时刻只允许一个 ?profile=1 请求，
+并发的请求返回409。
+"""
+import cProfile
+import hmac
+import io
+import os
+import pstats
+import sys
+import time
+from collections import Counter
+
+from flask import Response, g, request
+
+import config
+from com.response import Status, to_json
+
+_active_sampler = None
+_active_request_profiler = None
+
+
+def _original(module_name: str, attr: str):
+    """获取未被gevent猴子补丁替换的原始对象，采样线程必须是真实的系统线程"""
+    try:
+        from gevent import monkey
+        return monkey.get_original(module_name, attr)
+    except ImportError:
+        return getattr(__import__(module_name), attr)
+
+
+class StackSampler:
+    """基于 sys._current_frames() 的统计采样器，在独立系统线程中运行"""
+
+    def __init__(self, interval: float = config.PROFILING_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self.done = False
+
+    def start(self, seconds: float):
+        start_new_thread = _original('_thread', 'start_new_thread')
+        start_new_thread(self._run, (seconds,))
+
+    def _run(self, seconds: float):
+        sleep = _original('time', 'sleep')
+        own_ident = _original('_thread', 'get_ident')()
+        deadline = time.monotonic() + seconds
+        try:
+            while time.monotonic() < deadline:
+                for ident, frame in sys._current_frames().items():
+                    if ident != own_ident:
+                        self.stacks[self._collapse(frame)] += 1
+                self.samples += 1
+                sleep(self.interval)
+        finally:
+            self.done = True
+
+    @staticmethod
+    def _collapse(frame) -> str:
+        names = []
+        while frame is not None:
+            code = frame.f_code
+            names.append(f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})")
+            frame = frame.f_back
+        names.reverse()
+        return ';'.join(names)
+
+    def folded(self) -> str:
+        """输出折叠栈格式：每行 "frame;frame;frame count" """
+        return ''.join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+def _json_response(status: Status, msg: str = None, data: dict = None) -> Response:
+    return Response(to_json(status, msg, data), status=status.value, mimetype='application/json')
+
+
+def _authorized() -> bool:
+    token = request.headers.get('X-Profile-Token', '')
+    return bool(config.PROFILING_TOKEN) and hmac.compare_digest(token, config.PROFILING_TOKEN)
+
+
+def profile_worker():
+    """对当前worker进行统计采样"""
+    global _active_sampler
+
+    if not _authorized():
+        return _json_response(Status.FORBIDDEN)
+
+    pid = request.args.get('pid', type=int)
+    if pid is not None and pid != os.getpid():
+        return _json_response(Status.CONFLICT, f'当前worker为 {os.getpid()}，请重试', {'pid': os.getpid()})
+
+    seconds = request.args.get('seconds', default=5.0, type=float)
+    if not 0 < seconds <= config.PROFILING_MAX_SECONDS:
+        return _json_response(Status.BAD_REQUEST, f'seconds 取值范围为 (0, {config.PROFILING_MAX_SECONDS}]')
+
+    if _active_sampler is not None:
+        return _json_response(Status.CONFLICT, '该worker正在采样中', {'pid': os.getpid()})
+
+    sampler = StackSampler()
+    _active_sampler = sampler
+    try:
+        sampler.start(seconds)
+        # gevent下time.sleep已被替换为协作式等待，不会阻塞worker处理其他请求
+        while not sampler.done:
+            time.sleep(0.05)
+    finally:
+        _active_sampler = None
+
+    folded = sampler.folded()
+    if request.args.get('save') == '1':
+        os.makedirs(config.PROFILING_OUTPUT_DIR, exist_ok=True)
+        path = os.path.join(config.PROFILING_OUTPUT_DIR,
+                            f"profile-{os.getpid()}-{time.strftime('%Y%m%d%H%M%S')}.folded")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(folded)
+        return _json_response(Status.SUCCESS, data={'pid': os.getpid(), 'samples': sampler.samples, 'path': path})
+
+    response = Response(folded, mimetype='text/plain')
+    response.headers['X-Profile-Pid'] = str(os.getpid())
+    response.headers['X-Profile-Samples'] = str(sampler.samples)
+    return response
+
+
+def _start_request_profile():
+    global _active_request_profiler
+
+    if request.args.get('profile') != '1' or not _authorized():
+        return None
+    if _active_request_profiler is not None:
+        # 同一线程上第二次 enable() 会静默替换前一个剖析器
+        return _json_response(Status.CONFLICT, '该worker正在剖析其他请求', {'pid': os.getpid()})
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # 已有其他剖析工具在运行
+        return _json_response(Status.CONFLICT, '该worker上已有其他剖析工具在运行', {'pid': os.getpid()})
+    _active_request_profiler = profiler
+    g._request_profiler = profiler
+    return None
+
+
+def _release_request_profiler():
+    global _active_request_profiler
+
+    profiler = g.pop('_request_profiler', None)
+    if profiler is not None:
+        profiler.disable()
+        _active_request_profiler = None
+    return profiler
+
+
+def _finish_request_profile(response):
+    profiler = _release_request_profiler()
+    if profiler is None:
+        return response
+
+    output = io.StringIO()
+    stats = pstats.Stats(profiler, stream=output)
+    stats.sort_stats('cumulative').print_stats(50)
+
+    profiled = Response(output.getvalue(), mimetype='text/plain')
+    profiled.headers['X-Profile-Pid'] = str(os.getpid())
+    profiled.headers['X-Profile-Status'] = str(response.status_code)
+    return profiled
+
+
+def _stop_request_profile(exc):
+    _release_request_profiler()
+
+
+def init_app(app):
+    """按配置注册剖析端点和钩子"""
+    if not config.PROFILING_ENABLED:
+        return
+    app.add_url_rule('/debug/profile', 'debug_profile', profile_worker)
+    app.before_request(_start_request_profile)
+    app.after_request(_finish_request_profile)
+    app.teardown_request(_stop_request_profile)
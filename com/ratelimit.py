@@ -0,0 +1,158 @@
+"""
+应用层限流（令牌桶）
+
+Nginx的 limit_req 是第一道防线，这里按客户端IP做更细的限制，带 API Key 的请求还要通过该Key的桶。
+令牌桶状态保存在共享内存文件中（默认 /dev/shm），所有Gunicorn worker看到同一份计数：
+
+- 文件被划分为固定大小的槽位，键哈希后直接定位，最多探测 _PROBE 个相邻槽位，单次检查 O(1)
+- 只对探测窗口所在的字节范围加 fcntl 记录锁，不同键之间基本不会互相阻塞
+- 槽位满时复用已回满的旧槽位（其状态等同于新桶），极端情况下多个键共享一个桶，只会更严格
+"""
+import fcntl
+import hashlib
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+
+from flask import Response, request
+
+import config
+from com.response import Status, to_bytes
+
+# 槽位结构：键哈希(uint64) + 剩余令牌(double) + 上次更新时间(double)，补齐到32字节
+_SLOT = struct.Struct('<Qdd8x')
+_PROBE = 4
+
+
+class TokenBucketStore:
+    """基于共享内存文件的令牌桶表"""
+
+    def __init__(self, path: str, slots: int, rate: float, burst: float):
+        self.path = path
+        self.slots = max(slots, _PROBE)
+        self.rate = rate
+        self.burst = burst
+        # 超过该时长未更新的桶必然已回满，可以被其他键复用
+        self.stale_after = burst / rate if rate > 0 else float('inf')
+        self._lock = threading.Lock()
+        self._fd = None
+        self._map = None
+
+    def _open(self):
+        size = self.slots * _SLOT.size
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        if os.fstat(fd).st_size < size:
+            os.ftruncate(fd, size)
+        self._map = mmap.mmap(fd, size, mmap.MAP_SHARED, mmap.PROT_READ | mmap.PROT_WRITE)
+        self._fd = fd
+
+    @staticmethod
+    def _hash(key: str) -> int:
+        value = int.from_bytes(hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest(), 'little')
+        return value or 1   # 0 表示空槽位
+
+    def consume(self, key: str, now: float = None):
+        """尝试消耗一个令牌，返回 (是否允许, 剩余令牌, 需等待秒数)"""
+        if self._map is None:
+            self._open()
+        if now is None:
+            now = time.time()
+
+        key_hash = self._hash(key)
+        first = key_hash % (self.slots - _PROBE + 1)
+        offset = first * _SLOT.size
+        length = _PROBE * _SLOT.size
+
+        with self._lock:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, length, offset)
+            try:
+                slot_offset, tokens, last = self._find_slot(key_hash, offset, now)
+                tokens = min(self.burst, tokens + max(0.0, now - last) * self.rate)
+                allowed = tokens >= 1.0
+                if allowed:
+                    tokens -= 1.0
+                _SLOT.pack_into(self._map, slot_offset, key_hash, tokens, now)
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, length, offset)
+
+        retry_after = 0.0 if allowed else (1.0 - tokens) / self.rate if self.rate > 0 else float('inf')
+        return allowed, tokens, retry_after
+
+    def _find_slot(self, key_hash: int, offset: int, now: float):
+        """在探测窗口内查找键对应的槽位，返回 (槽位偏移, 令牌, 上次时间)"""
+        reusable = None
+        for i in range(_PROBE):
+            slot_offset = offset + i * _SLOT.size
+            slot_hash, tokens, last = _SLOT.unpack_from(self._map, slot_offset)
+            if slot_hash == key_hash:
+                return slot_offset, tokens, last
+            if reusable is None and (slot_hash == 0 or now - last > self.stale_after):
+                reusable = slot_offset
+        if reusable is not None:
+            return reusable, self.burst, now
+        # 窗口已满且都在使用中：与第一个槽位共享桶
+        _, tokens, last = _SLOT.unpack_from(self._map, offset)
+        return offset, tokens, last
+
+
+_store = None
+
+
+def _default_path() -> str:
+    if config.RATE_LIMIT_FILE:
+        return config.RATE_LIMIT_FILE
+    directory = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+    return os.path.join(directory, 'bigbrother_server_ratelimit')
+
+
+def get_store() -> TokenBucketStore:
+    global _store
+    if _store is None:
+        _store = TokenBucketStore(_default_path(), config.RATE_LIMIT_SLOTS,
+                                  config.RATE_LIMIT_RATE, config.RATE_LIMIT_BURST)
+    return _store
+
+
+def client_keys():
+    """限流键：始终包含客户端IP（经本机Nginx转发时取X-Real-IP），带 X-API-Key 时再加上该Key
+
+    API Key 未经认证，客户端可以随意更换，因此不能代替IP桶，只能在IP桶之外额外限制。
+    未经Nginx、直接从本机访问Gunicorn的请求（健康监控、部署门禁等内部流量）返回空列表，不做限流。
+    """
+    remote_addr = request.remote_addr or ''
+    is_loopback = remote_addr in ('127.0.0.1', '::1')
+    if is_loopback and 'X-Real-IP' not in request.headers:
+        return []
+    if is_loopback:
+        remote_addr = request.headers['X-Real-IP']
+    keys = [f'ip:{remote_addr}']
+    api_key = request.headers.get('X-API-Key')
+    if api_key:
+        keys.append(f'key:{api_key}')
+    return keys
+
+
+def _check_rate_limit():
+    if request.path.startswith(config.RATE_LIMIT_EXEMPT_PATHS):
+        return None
+    # 依次检查，任一桶拒绝即返回429，被IP桶拒绝的请求不再消耗Key桶的令牌
+    for key in client_keys():
+        allowed, _, retry_after = get_store().consume(key)
+        if not allowed:
+            break
+    else:
+        return None
+    response = Response(to_bytes(Status.TOO_MANY_REQUESTS), status=Status.TOO_MANY_REQUESTS.value,
+                        mimetype='application/json')
+    response.headers['Retry-After'] = str(max(1, int(retry_after + 0.999)))
+    return response
+
+
+def init_app(app):
+    """按配置注册限流检查"""
+    if not config.RATE_LIMIT_ENABLED:
+        return
+    app.before_request(_check_rate_limit)
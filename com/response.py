@@ -1,35 +1,59 @@
 from enum import Enum
 import json
+
+from com.models import Model, dumps
+
 class Status(Enum):
     SUCCESS = 200
     BAD_REQUEST = 400   # 请求无效，服务器无法理解。
     UNAUTHORIZED = 401  # 请求未授权，需要认证信息
     FORBIDDEN = 403     # 请求未授权，需要认证信息
     NOT_FOUND = 404     # 请求未授权，需要认证信息
+    CONFLICT = 409      # 请求与服务器当前状态冲突
+    TOO_MANY_REQUESTS = 429  # 请求过于频繁，已被限流
     UNDEFINED = 500
 
+def _default_message(status: Status) -> str:
+    if status == Status.SUCCESS:
+        return 'Success'
+    elif status == Status.BAD_REQUEST:
+        return 'Bad Request'
+    elif status == Status.UNAUTHORIZED:
+        return 'Unauthorized'
+    elif status == Status.FORBIDDEN:
+        return 'Forbidden'
+    elif status == Status.NOT_FOUND:
+        return 'Not Found'
+    elif status == Status.CONFLICT:
+        return 'Conflict'
+    elif status == Status.TOO_MANY_REQUESTS:
+        return 'Too Many Requests'
+    elif status == Status.UNDEFINED:
+        return 'Undefined'
+
 def to_json(status: Status = Status.SUCCESS, msg: str = None, data: dict = None) -> str:
     response_dict = dict()
     response_dict['code'] = status.value
     if msg is None:
-        if status == Status.SUCCESS:
-            response_dict['message'] = 'Success'
-        elif status == Status.BAD_REQUEST:
-            response_dict['message'] = 'Bad Request'
-        elif status == Status.UNAUTHORIZED:
-            response_dict['message'] = 'Unauthorized'
-        elif status == Status.FORBIDDEN:
-            response_dict['message'] = 'Forbidden'
-        elif status == Status.NOT_FOUND:
-            response_dict['message'] = 'Not Found'
-        elif status == Status.UNDEFINED:
-            response_dict['message'] = 'Undefined'
-        elif status == Status.UNAUTHORIZED:
-            response_dict['message'] = 'Unauthorized'
+        response_dict['message'] = _default_message(status)
     else:
         response_dict['message'] = msg
-    if data is not None:
+    if isinstance(data, Model):
+        response_dict['data'] = data.to_dict()
+    elif data is not None:
         response_dict['data'] = data
     else:
         response_dict['data'] = {}
     return json.dumps(response_dict)
+
+def to_bytes(status: Status = Status.SUCCESS, msg: str = None, data=None) -> bytes:
+    """与to_json结构相同，紧凑编码为bytes；data为Model时直接拼接其序列化结果"""
+    if isinstance(data, Model):
+        body = data.to_bytes()
+    else:
+        body = dumps(data if data is not None else {})
+    head = dumps({
+        'code': status.value,
+        'message': _default_message(status) if msg is None else msg,
+    })
+    return head[:-1] + b',"data":' + body + b'}'
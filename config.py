@@ -0,0 +1,41 @@
+import os
+
+
+def _env_bool(name: str, default: bool = False) -> bool:
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def _env_services(name: str) -> dict:
+    """解析 "name=http://host:port,other=https://host" 格式的下游服务配置"""
+    services = {}
+    for item in os.environ.get(name, '').split(','):
+        if '=' in item:
+            key, url = item.split('=', 1)
+            services[key.strip()] = url.strip()
+    return services
+
+
+# 性能剖析（默认关闭，需同时配置令牌才能访问）
+PROFILING_ENABLED = _env_bool('BIGBROTHER_PROFILING')
+PROFILING_TOKEN = os.environ.get('BIGBROTHER_PROFILING_TOKEN', '')
+PROFILING_MAX_SECONDS = 60
+PROFILING_SAMPLE_INTERVAL = 0.005   # 采样间隔（秒）
+PROFILING_OUTPUT_DIR = os.environ.get('BIGBROTHER_PROFILING_DIR', '/var/log/bigbrother_server/profiles')
+
+# 下游连接池（每个worker独立）
+CLIENT_POOL_SIZE = int(os.environ.get('BIGBROTHER_CLIENT_POOL_SIZE', '10'))
+CLIENT_POOL_IDLE_TIMEOUT = 60.0     # 空闲连接回收时间（秒）
+CLIENT_POOL_ACQUIRE_TIMEOUT = 5.0   # 等待空闲连接的最长时间（秒）
+CLIENT_REQUEST_TIMEOUT = 10.0       # 下游请求超时（秒）
+HTTP_SERVICES = _env_services('BIGBROTHER_HTTP_SERVICES')   # 下游HTTP服务 {名称: 地址}
+
+# 应用层限流（令牌桶，所有worker共享）
+RATE_LIMIT_ENABLED = _env_bool('BIGBROTHER_RATE_LIMIT', True)
+RATE_LIMIT_RATE = float(os.environ.get('BIGBROTHER_RATE_LIMIT_RATE', '20'))     # 每秒补充令牌数
+RATE_LIMIT_BURST = float(os.environ.get('BIGBROTHER_RATE_LIMIT_BURST', '40'))   # 桶容量
+RATE_LIMIT_SLOTS = 65536            # 共享表槽位数
+RATE_LIMIT_FILE = os.environ.get('BIGBROTHER_RATE_LIMIT_FILE', '')   # 为空时使用 /dev/shm
+RATE_LIMIT_EXEMPT_PATHS = ('/health', '/debug/')
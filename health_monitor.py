@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Flask应用健康监控守护进程
+通过长连接周期性探测/health，连续失败后按阶段升级处理：告警 → 平滑重载(HUP) → 重启
+"""
+
+import argparse
+import http.client
+import json
+import logging
+import os
+import signal
+import subprocess
+import sys
+import time
+from collections import deque
+from urllib.parse import urlsplit
+
+# 升级阶段
+STAGE_NONE = 0
+STAGE_ALERT = 1
+STAGE_RELOAD = 2
+STAGE_RESTART = 3
+
+logger = logging.getLogger("health_monitor")
+
+
+class HealthMonitor:
+    def __init__(self, url, service_name, interval=10.0, timeout=3.0,
+                 fail_threshold=3, recover_threshold=2, reload_after=2, restart_after=3,
+                 cooldown=60.0, history_size=360, alert_command=None, status_file=None):
+        parts = urlsplit(url)
+        self.host = parts.hostname or "127.0.0.1"
+        self.port = parts.port or 80
+        self.path = parts.path or "/"
+        self.service_name = service_name
+        self.interval = interval
+        self.timeout = timeout
+        self.fail_threshold = fail_threshold          # 连续失败多少次判定为不健康
+        self.recover_threshold = recover_threshold    # 连续成功多少次判定为恢复
+        self.reload_after = reload_after              # 告警后再失败多少次执行重载
+        self.restart_after = restart_after            # 重载后再失败多少次执行重启
+        self.cooldown = cooldown                      # 两次处理动作之间的最小间隔（秒）
+        self.alert_command = alert_command
+        self.status_file = status_file
+
+        # 最近的探测记录 (时间戳, 延迟秒数, 是否成功)
+        self.history = deque(maxlen=history_size)
+        self.connection = None
+        self.healthy = True
+        self.stage = STAGE_NONE
+        self.consecutive_failures = 0
+        self.consecutive_successes = 0
+        self.failures_since_action = 0
+        self.stale_retries = 0      # 长连接已被服务端关闭而重连的次数
+        self.last_action_time = None
+        self.last_error = None
+
+    def connect(self):
+        """建立到应用的长连接"""
+        self.connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+    def request_once(self):
+        """在现有连接上发送一次探测请求，返回HTTP状态码"""
+        if self.connection is None:
+            self.connect()
+        self.connection.request("GET", self.path, headers={"Connection": "keep-alive"})
+        response = self.connection.getresponse()
+        response.read()
+        if response.will_close:
+            self.close()
+        return response.status
+
+    def probe(self):
+        """执行一次探测，返回 (是否成功, 延迟秒数, 错误信息)"""
+        start = time.monotonic()
+        try:
+            try:
+                status = self.request_once()
+            except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError):
+                # 服务端关闭了空闲的长连接，重连后重试一次，不计为失败。
+                # 频繁出现说明Gunicorn的keepalive小于探测间隔
+                self.stale_retries += 1
+                logger.warning(f"长连接已被服务端关闭，重连重试（累计 {self.stale_retries} 次）")
+                self.close()
+                start = time.monotonic()
+                status = self.request_once()
+        except (OSError, http.client.HTTPException) as e:
+            self.close()
+            return False, time.monotonic() - start, f"{type(e).__name__}: {e}"
+
+        latency = time.monotonic() - start
+        if status != 200:
+            return False, latency, f"HTTP状态码: {status}"
+        return True, latency, None
+
+    def record(self, ok, latency, error):
+        """记录探测结果，按滞回阈值更新健康状态并决定是否升级处理"""
+        self.history.append((time.time(), latency, ok))
+        self.last_error = error
+
+        if ok:
+            self.consecutive_failures = 0
+            self.consecutive_successes += 1
+            if not self.healthy and self.consecutive_successes >= self.recover_threshold:
+                self.healthy = True
+                self.stage = STAGE_NONE
+                self.failures_since_action = 0
+                logger.info("应用已恢复健康")
+            return
+
+        self.consecutive_successes = 0
+        self.consecutive_failures += 1
+        logger.warning(f"健康检查失败({self.consecutive_failures}): {error}")
+
+        if self.healthy:
+            if self.consecutive_failures >= self.fail_threshold:
+                self.healthy = False
+                self.escalate(STAGE_ALERT)
+            return
+
+        self.failures_since_action += 1
+        if self.stage == STAGE_ALERT and self.failures_since_action >= self.reload_after:
+            self.escalate(STAGE_RELOAD)
+        elif self.stage >= STAGE_RELOAD and self.failures_since_action >= self.restart_after:
+            self.escalate(STAGE_RESTART)
+
+    def escalate(self, stage):
+        """执行对应阶段的处理动作"""
+        now = time.monotonic()
+        if (stage > STAGE_ALERT and self.last_action_time is not None
+                and now - self.last_action_time < self.cooldown):
+            return
+
+        self.stage = stage
+        self.failures_since_action = 0
+        if stage == STAGE_ALERT:
+            logger.error(f"应用不健康，连续失败 {self.consecutive_failures} 次: {self.last_error}")
+            if self.alert_command:
+                self.run_action(self.alert_command, shell=True)
+            return
+
+        self.last_action_time = now
+        self.close()
+        if stage == STAGE_RELOAD:
+            logger.error(f"平滑重载服务: {self.service_name}")
+            self.run_action(["systemctl", "reload", self.service_name])
+        else:
+            logger.error(f"重启服务: {self.service_name}")
+            self.run_action(["systemctl", "restart", self.service_name])
+
+    def run_action(self, command, shell=False):
+        try:
+            result = subprocess.run(command, shell=shell, capture_output=True, text=True, timeout=60)
+            if result.returncode != 0:
+                logger.error(f"命令执行失败({result.returncode}): {command} {result.stderr.strip()}")
+        except (OSError, subprocess.SubprocessError) as e:
+            logger.error(f"命令执行异常: {command} {e}")
+
+    def latency_summary(self):
+        """根据环形缓冲区计算延迟统计（毫秒）"""
+        latencies = sorted(latency for _, latency, ok in self.history if ok)
+        if not latencies:
+            return {}
+
+        def percentile(p):
+            index = min(len(latencies) - 1, int(round(p / 100.0 * (len(latencies) - 1))))
+            return round(latencies[index] * 1000, 2)
+
+        return {
+            "p50_ms": percentile(50),
+            "p95_ms": percentile(95),
+            "p99_ms": percentile(99),
+            "max_ms": round(latencies[-1] * 1000, 2),
+        }
+
+    def write_status(self):
+        """原子写入当前状态，供运维查看"""
+        if not self.status_file:
+            return
+        total = len(self.history)
+        failures = sum(1 for _, _, ok in self.history if not ok)
+        status = {
+            "timestamp": time.time(),
+            "healthy": self.healthy,
+            "stage": self.stage,
+            "consecutive_failures": self.consecutive_failures,
+            "last_error": self.last_error,
+            "checks": total,
+            "stale_retries": self.stale_retries,
+            "failure_rate": round(failures / total, 4) if total else 0.0,
+            "latency": self.latency_summary(),
+        }
+        tmp_path = f"{self.status_file}.tmp-{os.getpid()}"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(status, f, ensure_ascii=False)
+            os.replace(tmp_path, self.status_file)
+        except OSError as e:
+            logger.warning(f"写入状态文件失败: {e}")
+
+    def run(self):
+        """主循环"""
+        logger.info(f"开始监控 http://{self.host}:{self.port}{self.path}，间隔 {self.interval}s，超时 {self.timeout}s")
+        try:
+            while True:
+                started = time.monotonic()
+                ok, latency, error = self.probe()
+                self.record(ok, latency, error)
+                self.write_status()
+                time.sleep(max(0.0, self.interval - (time.monotonic() - started)))
+        finally:
+            self.close()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Flask应用健康监控守护进程")
+    parser.add_argument("--url", default="http://127.0.0.1:5000/health", help="健康检查地址")
+    parser.add_argument("--service", default="bigbrother_server.service", help="systemd服务名")
+    parser.add_argument("--interval", type=float, default=10.0, help="探测间隔（秒）")
+    parser.add_argument("--timeout", type=float, default=3.0, help="单次探测超时（秒）")
+    parser.add_argument("--fail-threshold", type=int, default=3, help="连续失败多少次判定为不健康")
+    parser.add_argument("--recover-threshold", type=int, default=2, help="连续成功多少次判定为恢复")
+    parser.add_argument("--reload-after", type=int, default=2, help="告警后再失败多少次执行平滑重载")
+    parser.add_argument("--restart-after", type=int, default=3, help="重载后再失败多少次执行重启")
+    parser.add_argument("--cooldown", type=float, default=60.0, help="两次处理动作之间的最小间隔（秒）")
+    parser.add_argument("--history-size", type=int, default=360, help="延迟历史记录条数")
+    parser.add_argument("--alert-command", default=None, help="告警时执行的命令")
+    parser.add_argument("--status-file", default=None, help="状态输出文件")
+    parser.add_argument("--log-file", default=None, help="日志文件")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """主函数"""
+    args = parse_args(argv)
+
+    handlers = [logging.StreamHandler(sys.stdout)]
+    if args.log_file:
+        handlers.append(logging.FileHandler(args.log_file, encoding="utf-8"))
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s", handlers=handlers)
+
+    # systemd停止服务时正常退出
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
+    monitor = HealthMonitor(
+        url=args.url,
+        service_name=args.service,
+        interval=args.interval,
+        timeout=args.timeout,
+        fail_threshold=args.fail_threshold,
+        recover_threshold=args.recover_threshold,
+        reload_after=args.reload_after,
+        restart_after=args.restart_after,
+        cooldown=args.cooldown,
+        history_size=args.history_size,
+        alert_command=args.alert_command,
+        status_file=args.status_file,
+    )
+    try:
+        monitor.run()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
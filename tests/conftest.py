@@ -0,0 +1,61 @@
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    """返回请求路径的HTTP/1.1长连接服务，状态码和断连行为由server上的属性控制"""
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        body = self.path.encode('utf-8')
+        self.send_response(self.server.status)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        # 不发送Connection: close直接断开，模拟keepalive超时后服务端关闭空闲连接
+        self.close_connection = self.server.drop_idle
+
+    do_POST = do_GET
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def http_server():
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), KeepAliveHandler)
+    httpd.daemon_threads = True
+    httpd.status = 200
+    httpd.drop_idle = False
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def write(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(content)
+
+
+def read(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+@pytest.fixture
+def deployer():
+    from app_deploy import FlaskDeployer
+
+    deployer = FlaskDeployer()
+    # 测试环境中不切换属主
+    deployer.user = os.getuid()
+    return deployer
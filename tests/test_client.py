@@ -0,0 +1,94 @@
+import threading
+import time
+
+import pytest
+
+from com.client import ConnectionPool, HTTPClient, PoolTimeout
+
+
+@pytest.fixture
+def http(http_server):
+    http = HTTPClient('test', f'http://127.0.0.1:{http_server.server_port}/api', timeout=2,
+                      max_size=2, idle_timeout=60, acquire_timeout=0.1)
+    yield http
+    http.close()
+
+
+def test_client_reuses_connection(http):
+    for i in range(5):
+        result = http.get(f'/items/{i}')
+        assert result.status == 200
+        assert result.body == f'/api/items/{i}'.encode()
+    metrics = http.pool.metrics()
+    assert metrics['created'] == 1
+    assert metrics['acquired'] == 5
+    assert metrics['in_use'] == 0
+    assert metrics['idle'] == 1
+
+
+def test_client_retries_stale_connection(http, http_server):
+    http_server.drop_idle = True
+    assert http.get('/a').status == 200
+    assert http.get('/b').body == b'/api/b'
+    assert http.pool.metrics()['created'] == 2
+
+
+def test_client_does_not_retry_post_on_stale_connection(http, http_server):
+    http_server.drop_idle = True
+    assert http.post('/a', body=b'x').status == 200
+    with pytest.raises(ConnectionError):
+        http.post('/b', body=b'x')
+    assert http.pool.metrics()['in_use'] == 0
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def test_pool_timeout_when_exhausted():
+    pool = ConnectionPool('fake', FakeConnection, max_size=1, idle_timeout=60, acquire_timeout=0.05)
+    conn = pool.acquire()
+    with pytest.raises(PoolTimeout):
+        pool.acquire()
+    pool.release(conn)
+    assert pool.acquire() is conn
+    metrics = pool.metrics()
+    assert metrics['timeouts'] == 1
+    assert metrics['waits'] == 0
+    assert metrics['created'] == 1
+
+
+def test_pool_waiter_gets_released_connection():
+    pool = ConnectionPool('fake', FakeConnection, max_size=1, idle_timeout=60, acquire_timeout=2)
+    conn = pool.acquire()
+    timer = threading.Timer(0.05, pool.release, args=(conn,))
+    timer.start()
+    assert pool.acquire() is conn
+    timer.join()
+    metrics = pool.metrics()
+    assert metrics['waits'] == 1
+    assert metrics['wait_time_max_ms'] > 0
+
+
+def test_pool_evicts_idle_connections():
+    pool = ConnectionPool('fake', FakeConnection, max_size=2, idle_timeout=0, acquire_timeout=0.1)
+    conn = pool.acquire()
+    pool.release(conn)
+    time.sleep(0.01)
+    assert pool.acquire() is not conn
+    assert conn.closed
+    assert pool.metrics()['evicted'] == 1
+
+
+def test_pool_discards_connection_on_error():
+    pool = ConnectionPool('fake', FakeConnection, max_size=1, idle_timeout=60, acquire_timeout=0.1)
+    with pytest.raises(RuntimeError):
+        with pool.connection() as conn:
+            raise RuntimeError
+    assert conn.closed
+    assert pool.metrics()['idle'] == 0
+    assert pool.metrics()['in_use'] == 0
@@ -0,0 +1,113 @@
+import os
+
+import pytest
+
+from conftest import read, write
+
+
+@pytest.fixture
+def deployer(deployer, tmp_path, monkeypatch):
+    # 所有路径指向临时目录，系统命令只记录不执行
+    deployer.app_dir = str(tmp_path / 'app')
+    deployer.rollback_dir = str(tmp_path / 'rollback')
+    deployer.config_rollback_dir = str(tmp_path / 'rollback-config')
+    deployer.nginx_config_path = str(tmp_path / 'nginx' / 'app.conf')
+    deployer.health_monitor_path = str(tmp_path / 'lib' / 'health_monitor.py')
+    monkeypatch.setattr(deployer, 'unit_path', lambda unit: str(tmp_path / 'systemd' / unit))
+    deployer.commands = []
+
+    def run_command(command, check=True):
+        # 执行disable时unit文件必须还在，否则systemctl会失败
+        if command.startswith('systemctl disable'):
+            assert os.path.exists(deployer.unit_path(command.split()[-1]))
+        deployer.commands.append(command)
+    monkeypatch.setattr(deployer, 'run_command', run_command)
+    return deployer
+
+
+def deploy_files(deployer, src):
+    deployer.sync_manifest, deployer.sync_result = deployer.sync_files(
+        src, deployer.app_dir, deployer.previous_manifest, deployer.rollback_dir
+    )
+
+
+def legacy_deployment(deployer, tmp_path):
+    """旧版部署：cp -r复制的文件、cron式健康检查脚本，没有清单和健康监控服务"""
+    write(f'{deployer.app_dir}/app.py', 'old')
+    write(f'{deployer.app_dir}/gunicorn.conf.py', 'keepalive = 2')
+    write(f'{deployer.app_dir}/health_check.sh', '#!/bin/bash')
+    write(deployer.unit_path(deployer.service_name), '[Service] old')
+    src = str(tmp_path / 'src')
+    write(f'{src}/app.py', 'new')
+    write(f'{src}/extra.py', 'extra')
+    return src
+
+
+def regenerate_config(deployer):
+    write(f'{deployer.app_dir}/gunicorn.conf.py', 'keepalive = 15')
+    write(deployer.unit_path(deployer.service_name), '[Service] new')
+    write(deployer.unit_path(deployer.health_service_name), '[Service] monitor')
+    write(deployer.health_monitor_path, 'monitor')
+    os.remove(f'{deployer.app_dir}/health_check.sh')
+
+
+def test_rollback_without_manifest_restores_files_and_config(deployer, tmp_path):
+    deploy_files(deployer, legacy_deployment(deployer, tmp_path))
+    deployer.snapshot_generated_config()
+    regenerate_config(deployer)
+    assert deployer.has_previous_version()
+
+    with pytest.raises(SystemExit):
+        deployer.reject_deployment(['p99'])
+
+    assert read(f'{deployer.app_dir}/app.py') == 'old'
+    assert not os.path.exists(f'{deployer.app_dir}/extra.py')
+    assert read(f'{deployer.app_dir}/gunicorn.conf.py') == 'keepalive = 2'
+    assert read(f'{deployer.app_dir}/health_check.sh') == '#!/bin/bash'
+    assert read(deployer.unit_path(deployer.service_name)) == '[Service] old'
+    assert not os.path.exists(deployer.unit_path(deployer.health_service_name))
+    assert not os.path.exists(deployer.health_monitor_path)
+
+    commands = deployer.commands
+    disable = commands.index(f'systemctl disable --now {deployer.health_service_name}')
+    assert disable < commands.index('systemctl daemon-reload')
+    assert f'systemctl restart {deployer.service_name}' in commands
+    assert f'systemctl restart {deployer.health_service_name}' not in commands
+
+
+def test_failed_step_after_snapshot_rolls_back(deployer, tmp_path, monkeypatch):
+    src = legacy_deployment(deployer, tmp_path)
+    for step in ('check_system', 'install_system_dependencies', 'create_flask_user', 'setup_python_environment',
+                 'create_tls_certificate', 'create_nginx_config', 'run_smoke_gate', 'create_deployment_info'):
+        monkeypatch.setattr(deployer, step, lambda: None)
+    monkeypatch.setattr(deployer, 'deploy_application', lambda: deploy_files(deployer, src))
+    monkeypatch.setattr(deployer, 'create_gunicorn_config', lambda: regenerate_config(deployer))
+    monkeypatch.setattr(deployer, 'create_systemd_service', lambda: None)
+    monkeypatch.setattr(deployer, 'create_health_check', lambda: None)
+
+    def start_services():
+        # 新版本导入失败，systemctl status 返回非0
+        raise SystemExit(1)
+    monkeypatch.setattr(deployer, 'start_services', start_services)
+
+    with pytest.raises(SystemExit):
+        deployer.deploy()
+
+    assert deployer.deployment_rejected
+    assert read(f'{deployer.app_dir}/app.py') == 'old'
+    assert read(f'{deployer.app_dir}/gunicorn.conf.py') == 'keepalive = 2'
+    assert f'systemctl restart {deployer.service_name}' in deployer.commands
+
+
+def test_first_deploy_stops_services(deployer, tmp_path):
+    src = str(tmp_path / 'src')
+    write(f'{src}/app.py', 'new')
+
+    deploy_files(deployer, src)
+    assert not deployer.has_previous_version()
+
+    with pytest.raises(SystemExit):
+        deployer.reject_deployment(['p99'])
+
+    assert f'systemctl stop {deployer.health_service_name}' in deployer.commands
+    assert f'systemctl stop {deployer.service_name}' in deployer.commands
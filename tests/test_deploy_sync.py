@@ -0,0 +1,78 @@
+import os
+
+from conftest import read, write
+
+
+def test_sync_copies_only_changed_files(deployer, tmp_path):
+    src, dest = str(tmp_path / 'src'), str(tmp_path / 'dest')
+    write(f'{src}/app.py', 'X = 1')
+    write(f'{src}/static/a.css', 'body {}')
+    write(f'{src}/.git/HEAD', 'ref')
+    write(f'{src}/com/__pycache__/x.pyc', 'bin')
+
+    manifest, result = deployer.sync_files(src, dest, {})
+    assert sorted(manifest) == ['app.py', 'static/a.css']
+    assert sorted(result['added']) == ['app.py', 'static/a.css']
+    assert not os.path.exists(f'{dest}/.git')
+
+    manifest, result = deployer.sync_files(src, dest, manifest)
+    assert result['added'] == result['modified'] == result['removed'] == []
+    assert result['bytes_copied'] == 0
+    assert result['restart_required'] is False
+
+    write(f'{src}/static/a.css', 'body {color: red}')
+    _, result = deployer.sync_files(src, dest, manifest)
+    assert result['modified'] == ['static/a.css']
+    assert result['restart_required'] is False
+
+
+def test_sync_removes_files_deleted_from_source(deployer, tmp_path):
+    src, dest, backup = str(tmp_path / 'src'), str(tmp_path / 'dest'), str(tmp_path / 'backup')
+    write(f'{src}/app.py', 'X = 1')
+    write(f'{src}/old.py', 'Y = 1')
+    manifest, _ = deployer.sync_files(src, dest, {})
+
+    os.remove(f'{src}/old.py')
+    write(f'{dest}/generated.txt', 'not managed by sync')
+    _, result = deployer.sync_files(src, dest, manifest, backup)
+    assert result['removed'] == ['old.py']
+    assert not os.path.exists(f'{dest}/old.py')
+    assert read(f'{backup}/old.py') == 'Y = 1'
+    assert os.path.exists(f'{dest}/generated.txt')
+
+
+def test_sync_does_not_trust_stale_manifest(deployer, tmp_path):
+    src, dest = str(tmp_path / 'src'), str(tmp_path / 'dest')
+    write(f'{src}/app.py', 'X = 1')
+    old_manifest, _ = deployer.sync_files(src, dest, {})
+
+    # 部署在同步之后中断，清单仍描述旧文件，但磁盘已是新内容
+    write(f'{src}/app.py', 'X = 2')
+    deployer.sync_files(src, dest, old_manifest)
+
+    write(f'{src}/app.py', 'X = 1')
+    _, result = deployer.sync_files(src, dest, old_manifest)
+    assert result['modified'] == ['app.py']
+    assert read(f'{dest}/app.py') == 'X = 1'
+
+
+def test_sync_skips_files_not_needed_at_runtime(deployer, tmp_path):
+    src, dest = str(tmp_path / 'src'), str(tmp_path / 'dest')
+    write(f'{src}/app.py', 'X = 1')
+    manifest, _ = deployer.sync_files(src, dest, {})
+
+    write(f'{src}/README.md', '# docs')
+    write(f'{src}/tests/test_app.py', 'def test(): pass')
+    write(f'{src}/app_deploy.py', 'deploy')
+    manifest, result = deployer.sync_files(src, dest, manifest)
+    assert sorted(manifest) == ['app.py']
+    assert result['restart_required'] is False
+    assert not os.path.exists(f'{dest}/tests')
+
+
+def test_sync_creates_nested_directories(deployer, tmp_path):
+    src, dest = str(tmp_path / 'src'), str(tmp_path / 'dest')
+    write(f'{src}/com/models/base.py', 'X = 1')
+    deployer.sync_files(src, dest, {})
+    assert os.stat(f'{dest}/com/models').st_uid == os.getuid()
+    assert read(f'{dest}/com/models/base.py') == 'X = 1'
@@ -0,0 +1,31 @@
+from app_deploy import FlaskDeployer
+
+
+def make_deployer(**attrs):
+    deployer = FlaskDeployer()
+    deployer.tls_enabled = True
+    for name, value in attrs.items():
+        setattr(deployer, name, value)
+    return deployer
+
+
+def test_stapling_without_chain_does_not_verify():
+    config = make_deployer().tls_config()
+    assert 'ssl_stapling on;' in config
+    assert 'ssl_stapling_verify' not in config
+    assert 'ssl_trusted_certificate' not in config
+
+
+def test_stapling_with_chain_verifies():
+    config = make_deployer(ssl_trusted_certificate='/etc/ssl/chain.pem').tls_config()
+    assert 'ssl_stapling_verify on;' in config
+    assert 'ssl_trusted_certificate /etc/ssl/chain.pem;' in config
+
+
+def test_self_signed_uses_separate_files(monkeypatch):
+    deployer = make_deployer(tls_self_signed=True, ssl_certificate='/etc/nginx/ssl/real.crt')
+    monkeypatch.setattr('os.path.exists', lambda path: True)
+    deployer.create_tls_certificate()
+    assert deployer.ssl_certificate.endswith('-selfsigned.crt')
+    assert deployer.ssl_certificate_key.endswith('-selfsigned.key')
+    assert 'ssl_stapling' not in deployer.tls_config()
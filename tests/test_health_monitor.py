@@ -0,0 +1,71 @@
+import pytest
+
+import health_monitor
+from health_monitor import HealthMonitor
+
+
+@pytest.fixture
+def monitor(http_server):
+    monitor = HealthMonitor(f'http://127.0.0.1:{http_server.server_port}/health', 'app.service',
+                            timeout=1, fail_threshold=3, recover_threshold=2,
+                            reload_after=2, restart_after=3, cooldown=0)
+    monitor.actions = []
+    monitor.run_action = lambda command, shell=False: monitor.actions.append(command)
+    yield monitor
+    monitor.close()
+
+
+def test_probe_reuses_connection(monitor):
+    assert monitor.probe()[0]
+    sock = monitor.connection.sock
+    assert monitor.probe()[0]
+    assert monitor.connection.sock is sock
+    assert monitor.stale_retries == 0
+
+
+def test_probe_retries_stale_connection(monitor, http_server):
+    http_server.drop_idle = True
+    assert monitor.probe()[0]
+    ok, _, error = monitor.probe()
+    assert ok, error
+    assert monitor.stale_retries == 1
+    assert monitor.consecutive_failures == 0
+
+
+def test_escalation_and_hysteresis(monitor):
+    for _ in range(2):
+        monitor.record(False, 0.0, 'down')
+    assert monitor.healthy and monitor.stage == health_monitor.STAGE_NONE
+
+    monitor.record(False, 0.0, 'down')
+    assert not monitor.healthy and monitor.stage == health_monitor.STAGE_ALERT
+
+    for _ in range(2):
+        monitor.record(False, 0.0, 'down')
+    assert monitor.stage == health_monitor.STAGE_RELOAD
+    assert monitor.actions == [['systemctl', 'reload', 'app.service']]
+
+    for _ in range(3):
+        monitor.record(False, 0.0, 'down')
+    assert monitor.stage == health_monitor.STAGE_RESTART
+    assert monitor.actions[-1] == ['systemctl', 'restart', 'app.service']
+
+    # 单次成功不足以恢复
+    monitor.record(True, 0.01, None)
+    assert not monitor.healthy
+    monitor.record(True, 0.01, None)
+    assert monitor.healthy and monitor.stage == health_monitor.STAGE_NONE
+
+
+def test_cooldown_suppresses_repeated_actions(monitor):
+    monitor.cooldown = 3600
+    for _ in range(3 + 2 + 3):
+        monitor.record(False, 0.0, 'down')
+    assert monitor.actions == [['systemctl', 'reload', 'app.service']]
+
+
+def test_non_200_is_failure(monitor, http_server):
+    http_server.status = 503
+    ok, _, error = monitor.probe()
+    assert not ok
+    assert '503' in error
@@ -0,0 +1,91 @@
+from typing import Dict, List, Literal, Optional, Set, Tuple, Union
+
+import pytest
+
+from com.models import Model, ValidationError
+
+
+class Tag(Model):
+    name: str
+
+
+class Item(Model):
+    id: int
+    price: float
+    tags: List[Tag] = []
+    attrs: Dict[str, int] = {}
+    note: Optional[str] = None
+    parent: Tag | None = None
+    code: Union[int, str] = 0
+
+
+def test_round_trip():
+    item = Item(id=1, price=2, tags=[{'name': 'a'}], parent=Tag(name='p'), code='x')
+    assert item.price == 2.0 and isinstance(item.price, float)
+    assert item.tags == [Tag(name='a')]
+    data = Item.from_bytes(item.to_bytes())
+    assert data == item
+    assert data.to_dict() == {'id': 1, 'price': 2.0, 'tags': [{'name': 'a'}], 'attrs': {},
+                              'note': None, 'parent': {'name': 'p'}, 'code': 'x'}
+
+
+def test_mutable_defaults_are_not_shared():
+    first, second = Item(id=1, price=1.0), Item(id=2, price=1.0)
+    first.tags.append(Tag(name='a'))
+    assert second.tags == []
+
+
+def test_validation_errors():
+    with pytest.raises(ValidationError, match='Item.id'):
+        Item(price=1.0)
+    with pytest.raises(ValidationError, match='Item.id'):
+        Item(id=True, price=1.0)
+    with pytest.raises(ValidationError, match='Item.parent'):
+        Item(id=1, price=1.0, parent=1)
+    with pytest.raises(ValidationError, match='Item.code'):
+        Item(id=1, price=1.0, code=1.5)
+    with pytest.raises(ValidationError, match=r'Item\.\*'):
+        Item.from_bytes(b'{')
+
+
+def test_custom_validator():
+    class User(Model):
+        name: str
+
+        @staticmethod
+        def validate_name(value):
+            if not value:
+                raise ValueError('不能为空')
+            return value.strip()
+
+    assert User(name=' a ').name == 'a'
+    with pytest.raises(ValidationError, match='不能为空'):
+        User(name='')
+
+
+def test_slots():
+    with pytest.raises(AttributeError):
+        Tag(name='a').other = 1
+
+
+@pytest.mark.parametrize('annotation', [Tuple[int, int], Set[str], Literal['a'], tuple, set, bytes,
+                                        Dict[int, str], Union[Tag, int]])
+def test_unsupported_annotation_is_rejected(annotation):
+    with pytest.raises(TypeError, match='Bad.value'):
+        type('Bad', (Model,), {'__annotations__': {'value': annotation}})
+
+
+@pytest.mark.parametrize('field', ['self', 'cls', 'data', 'to_dict', '_private'])
+def test_reserved_field_name_is_rejected(field):
+    with pytest.raises(TypeError, match=f'Bad.{field}'):
+        type('Bad', (Model,), {'__annotations__': {field: int}})
+
+
+def test_field_named_like_builtin():
+    class Named(Model):
+        str: str
+        n: int
+
+    assert Named(str='x', n=1).to_dict() == {'str': 'x', 'n': 1}
+    with pytest.raises(ValidationError, match='Named.n'):
+        Named(str='x', n='bad')
@@ -0,0 +1,46 @@
+import pytest
+
+import config
+from com import profiler
+
+
+@pytest.fixture
+def client(monkeypatch):
+    from flask import Flask
+
+    monkeypatch.setattr(config, 'PROFILING_ENABLED', True)
+    monkeypatch.setattr(config, 'PROFILING_TOKEN', 'secret')
+    app = Flask(__name__)
+
+    @app.route('/work')
+    def work():
+        return 'done'
+
+    profiler.init_app(app)
+    return app.test_client()
+
+
+def test_request_profile_requires_token(client):
+    assert client.get('/work?profile=1').data == b'done'
+
+
+def test_request_profile_returns_stats(client):
+    response = client.get('/work?profile=1', headers={'X-Profile-Token': 'secret'})
+    assert response.mimetype == 'text/plain'
+    assert b'function calls' in response.data
+    assert profiler._active_request_profiler is None
+
+
+def test_concurrent_request_profile_is_rejected(client, monkeypatch):
+    monkeypatch.setattr(profiler, '_active_request_profiler', object())
+    response = client.get('/work?profile=1', headers={'X-Profile-Token': 'secret'})
+    assert response.status_code == 409
+
+
+def test_worker_sampler_returns_folded_stacks(client):
+    response = client.get('/debug/profile?seconds=0.1', headers={'X-Profile-Token': 'secret'})
+    assert response.status_code == 200
+    assert int(response.headers['X-Profile-Samples']) > 0
+    line = response.data.decode().splitlines()[0]
+    stack, count = line.rsplit(' ', 1)
+    assert ';' in stack and int(count) > 0
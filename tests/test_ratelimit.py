@@ -0,0 +1,78 @@
+import multiprocessing
+
+import pytest
+
+import config
+from com import ratelimit
+from com.ratelimit import TokenBucketStore
+
+
+def test_bucket_allows_burst_then_refills(tmp_path):
+    store = TokenBucketStore(str(tmp_path / 'buckets'), slots=64, rate=2, burst=3)
+    results = [store.consume('ip:1', now=100.0)[0] for _ in range(4)]
+    assert results == [True, True, True, False]
+    allowed, _, retry_after = store.consume('ip:1', now=100.0)
+    assert not allowed and retry_after == pytest.approx(0.5)
+    assert store.consume('ip:1', now=100.5)[0]
+    # 其他键不受影响
+    assert store.consume('ip:2', now=100.5)[0]
+
+
+def _consume_many(path, count, queue):
+    store = TokenBucketStore(path, slots=64, rate=0.001, burst=50)
+    queue.put(sum(store.consume('ip:shared')[0] for _ in range(count)))
+
+
+def test_bucket_is_shared_across_processes(tmp_path):
+    path = str(tmp_path / 'buckets')
+    queue = multiprocessing.Queue()
+    workers = [multiprocessing.Process(target=_consume_many, args=(path, 30, queue)) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    allowed = sum(queue.get(timeout=10) for _ in workers)
+    for worker in workers:
+        worker.join()
+    assert allowed == 50
+
+
+@pytest.fixture
+def client(monkeypatch, tmp_path):
+    from flask import Flask
+
+    monkeypatch.setattr(config, 'RATE_LIMIT_ENABLED', True)
+    monkeypatch.setattr(config, 'RATE_LIMIT_FILE', str(tmp_path / 'buckets'))
+    monkeypatch.setattr(config, 'RATE_LIMIT_RATE', 0.001)
+    monkeypatch.setattr(config, 'RATE_LIMIT_BURST', 2)
+    monkeypatch.setattr(ratelimit, '_store', None)
+    app = Flask(__name__)
+
+    @app.route('/work')
+    def work():
+        return 'done'
+
+    ratelimit.init_app(app)
+    return app.test_client()
+
+
+def test_ip_is_limited(client):
+    headers = {'X-Real-IP': '10.0.0.1'}
+    assert [client.get('/work', headers=headers).status_code for _ in range(3)] == [200, 200, 429]
+    response = client.get('/work', headers=headers)
+    assert int(response.headers['Retry-After']) >= 1
+    assert client.get('/work', headers={'X-Real-IP': '10.0.0.2'}).status_code == 200
+
+
+def test_rotating_api_keys_do_not_bypass_ip_limit(client):
+    statuses = [client.get('/work', headers={'X-Real-IP': '10.0.0.1', 'X-API-Key': f'k{i}'}).status_code
+                for i in range(3)]
+    assert statuses == [200, 200, 429]
+
+
+def test_api_key_is_limited_across_ips(client):
+    statuses = [client.get('/work', headers={'X-Real-IP': f'10.0.0.{i}', 'X-API-Key': 'shared'}).status_code
+                for i in range(3)]
+    assert statuses == [200, 200, 429]
+
+
+def test_internal_traffic_is_not_limited(client):
+    assert all(client.get('/work').status_code == 200 for _ in range(5))
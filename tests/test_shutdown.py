@@ -0,0 +1,32 @@
+import subprocess
+
+import pytest
+
+from app_shutdown import FlaskShutdown
+
+
+@pytest.fixture
+def shutdown():
+    return FlaskShutdown()
+
+
+def service_environment(shutdown, monkeypatch, stdout, returncode=0):
+    monkeypatch.setattr(shutdown, 'run_command',
+                        lambda command, check=False: subprocess.CompletedProcess(command, returncode, stdout=stdout))
+
+
+def test_rate_limit_file_from_service_environment(shutdown, monkeypatch):
+    service_environment(shutdown, monkeypatch, 'A=1 "BIGBROTHER_RATE_LIMIT_FILE=/run/app limit"\n')
+    assert shutdown.get_rate_limit_file() == '/run/app limit'
+
+
+def test_rate_limit_file_falls_back_to_temp_dir(shutdown, monkeypatch, tmp_path):
+    service_environment(shutdown, monkeypatch, f'TMPDIR={tmp_path}\n')
+    monkeypatch.setattr('os.path.isdir', lambda path: path == str(tmp_path))
+    assert shutdown.get_rate_limit_file() == f'{tmp_path}/bigbrother_server_ratelimit'
+
+
+def test_rate_limit_file_default(shutdown, monkeypatch):
+    service_environment(shutdown, monkeypatch, '', returncode=1)
+    monkeypatch.setattr('os.path.isdir', lambda path: path == '/dev/shm')
+    assert shutdown.get_rate_limit_file() == '/dev/shm/bigbrother_server_ratelimit'